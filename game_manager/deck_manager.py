@@ -1,12 +1,47 @@
-import random
+import numpy as np
+
+# Spades, Hearths, Diamonds, Clubs
+SUITS = ['S', 'H', 'D', 'C']
+VALUES = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
+# 'AL' is the low ace used when looking for A-2-3-4-5 straights. It is never part of a deck
+CARD_VALUES = VALUES + ['AL']
+
+NUMBER_OF_CARDS = len(SUITS) * len(VALUES)
+SUIT_BITS = 2
+SUIT_MASK = (1 << SUIT_BITS) - 1
+
+SUIT_TO_INDEX = {suit: index for index, suit in enumerate(SUITS)}
+VALUE_TO_INDEX = {value: index for index, value in enumerate(CARD_VALUES)}
 
 
 class Card:
+    # A card is stored as one integer: the value index ('2' = 0, ..., 'A' = 12) in the upper bits
+    # and the suit index in the two lowest bits. The cards in a deck are 0..51
+    __slots__ = ('index',)
+
     def __init__(self, suit, value) -> None:
         if not isinstance(suit, str) or not isinstance(value, str):
             raise TypeError
-        self.suit: str = suit
-        self.value: str = value
+        self.index: int = VALUE_TO_INDEX[value] << SUIT_BITS | SUIT_TO_INDEX[suit]
+
+    @classmethod
+    def from_index(cls, index: int) -> 'Card':
+        card = cls.__new__(cls)
+        card.index = index
+        return card
+
+    @classmethod
+    def from_string(cls, card_string: str) -> 'Card':
+        # 'SA' -> Card('S', 'A')
+        return cls(card_string[0], card_string[1:])
+
+    @property
+    def suit(self) -> str:
+        return SUITS[self.index & SUIT_MASK]
+
+    @property
+    def value(self) -> str:
+        return CARD_VALUES[self.index >> SUIT_BITS]
 
     def __str__(self):
         return self.suit + self.value
@@ -15,36 +50,37 @@ class Card:
         return self.__str__()
 
     def __eq__(self, other_card) -> bool:
-        return self.suit == other_card.suit and self.value == other_card.value
+        return isinstance(other_card, Card) and self.index == other_card.index
+
+    def __hash__(self) -> int:
+        return self.index
 
 
 class DeckManager():
-    # Spades, Hearths, Diamonds, Clubs
-    suits = ['S', 'H', 'D', 'C']
-    values = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
+    suits = SUITS
+    values = VALUES
 
-    def __init__(self, custom_deck_without_certain_cards=False, invalid_cards=[]) -> None:
+    def __init__(self, custom_deck_without_certain_cards=False, invalid_cards=[], rng=None) -> None:
+        # rng is a numpy Generator. Decks with generators from the same seed are shuffled the same way
+        self.rng = np.random.default_rng() if rng is None else rng
         if not custom_deck_without_certain_cards:
             self.create_deck_of_cards()
         else:
             self.create_deck_of_cards_without_cards(invalid_cards)
 
     def create_deck_of_cards(self):
-        self.cards = [Card(suit, value)
-                      for value in self.values for suit in self.suits]
+        self.cards = [Card.from_index(index)
+                      for index in range(NUMBER_OF_CARDS)]
 
     def create_deck_of_cards_without_cards(self, invalid_cards):
-        cards = []
-        for value in self.values:
-            for suit in self.suits:
-                new_card = Card(suit, value)
-                if new_card not in invalid_cards:
-                    cards.append(new_card)
-        self.cards = cards
+        invalid_indices = {card.index for card in invalid_cards}
+        self.cards = [Card.from_index(index) for index in range(
+            NUMBER_OF_CARDS) if index not in invalid_indices]
 
     def shuffle_cards(self):
         # assert len(self.cards) == 52
-        random.shuffle(self.cards)
+        cards = self.cards
+        self.cards = [cards[i] for i in self.rng.permutation(len(cards))]
 
     def get_n_cards(self, num_cards):
         # This should be an illegal state
@@ -6,6 +6,12 @@ from .deck_manager import DeckManager, Card
 from .user_interface import UserInterface
 from .pivotal_parameters import pivotal_parameters as piv
 
+import itertools
+import numpy as np
+
+# Unique in the process, also across games, so that players can tell hands apart
+hand_ids = itertools.count()
+
 
 class RoundManager:
     """
@@ -15,7 +21,7 @@ class RoundManager:
     """
 
     def __init__(self, game_manager: 'GameManager') -> None:
-        self.deck_manager = DeckManager()
+        self.deck_manager = DeckManager(rng=game_manager.rng)
         self.game_manager = game_manager
         self.state_manager = StateManager()
         self.community_cards = []
@@ -25,6 +31,7 @@ class RoundManager:
 
     def initialize_round(self):
         # Initialized for each new round
+        self.hand_id = next(hand_ids)
         self.current_bet = 2 * piv.small_blind
 
         self.collect_cards()
@@ -76,8 +83,13 @@ class RoundManager:
         action = player.action(state)
         action_bet, update_starting_index = self.game_manager.action_manager.perform_action(
             player, action, self.current_bet)
+        self.record_action(player, action)
         return action_bet, update_starting_index
 
+    def record_action(self, player, action, is_blind=False):
+        self.game_manager.hand_history_writer.record_action(
+            len(self.community_cards), self.game_manager.players.index(player), action, player.betted_chips, is_blind)
+
     def play_player_round(self, player):
         
         # this is where the action from a player is requested and performed
@@ -131,8 +143,10 @@ class RoundManager:
         if player.chips > bet_amount:
             self.game_manager.action_manager.perform_action(
                 player, 'B', bet=bet_amount)
+            self.record_action(player, 'B', is_blind=True)
         else:
             self.game_manager.action_manager.perform_action(player, 'A')
+            self.record_action(player, 'A', is_blind=True)
 
     def round_is_over(self, number_of_actions):
         if number_of_actions < len(self.game_manager.players):
@@ -212,6 +226,7 @@ class TexasHoldemRoundManager(RoundManager):
 
     def play_preflop(self):
         super().deal_hole_cards(2)
+        self.game_manager.hand_history_writer.record_hole_cards(self.game_manager.players)
         # TOOO: choose the two previous active players, not just from player list (since all players, inluded busted players, are here)
         player_small_blind, player_big_blind = self.get_small_and_big_blind_players()
         
@@ -229,6 +244,7 @@ class TexasHoldemRoundManager(RoundManager):
 
     def play_round(self):
         super().initialize_round()
+        self.game_manager.hand_history_writer.start_hand(self.game_manager.players, self.starting_player_index)
 
         self.play_preflop()
         self.play_flop()
@@ -263,6 +279,8 @@ class TexasHoldemRoundManager(RoundManager):
             self.game_manager.players, self.community_cards, winners)
         self.game_manager.pot_manager.distribute_pot(
             self.players_with_betted_chips(), winners)
+        self.game_manager.hand_history_writer.end_hand(
+            self.game_manager.players, self.community_cards, winners)
 
         for player in self.game_manager.players:
             player.round_ended()
@@ -332,11 +350,15 @@ class GameManager:
     """
     players = []
 
-    def __init__(self) -> None:
-        self.create_players()
+    def __init__(self, players=None, user_interface=None, hand_history_writer=None, rng=None) -> None:
+        # Without arguments, the players come from pivotal_parameters and the game is played in the terminal.
+        # With a HandHistoryWriter, every hand is appended to its file. rng is the numpy Generator that shuffles the deck
+        self.set_rng(rng)
+        self.create_players(players)
         self.set_round_manager()
         self.set_hands_evaluator()
-        self.set_user_interface()
+        self.set_user_interface(user_interface)
+        self.set_hand_history_writer(hand_history_writer)
         self.set_action_manager()
         self.set_pot_manager()
 
@@ -346,16 +368,27 @@ class GameManager:
     def set_hands_evaluator(self):
         self.hands_evaluator = HandsEvaluator()
 
-    def set_user_interface(self):
-        self.user_interface = UserInterface()
+    def set_user_interface(self, user_interface=None):
+        self.user_interface = UserInterface() if user_interface is None else user_interface
+
+    def set_rng(self, rng=None):
+        self.rng = np.random.default_rng() if rng is None else rng
+
+    def set_hand_history_writer(self, hand_history_writer=None):
+        # Imported here, since hand_history imports ActionManager from this module
+        from .hand_history import NullHandHistoryWriter
+        self.hand_history_writer = NullHandHistoryWriter() if hand_history_writer is None else hand_history_writer
 
     def set_action_manager(self):
         self.action_manager = ActionManager()
 
-    def create_players(self):
+    def create_players(self, players=None):
+        if players is not None:
+            self.players = players
+            return
         self.players = [HumanPlayer()
                         for _ in range(piv.number_of_human_players)]
-        self.players += [AIPlayer(hide_cards=True)
+        self.players += [AIPlayer(hide_cards=True, rng=np.random.default_rng(self.rng.integers(1 << 63)))
                          for _ in range(piv.number_of_AI_players)]
 
     def set_round_manager(self):
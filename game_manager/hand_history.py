@@ -0,0 +1,222 @@
+from typing import BinaryIO, Iterator, List, NamedTuple, Tuple
+from .deck_manager import Card
+from .game_manager import ActionManager
+
+import os
+import struct
+
+# Start of every hand history file, followed by the format version
+MAGIC = b'PKHH'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sB')
+# Bytes of a hand after its size field
+RECORD_SIZE = struct.Struct('<I')
+# Number of players, starting player index, number of actions
+HAND_HEADER = struct.Struct('<BBH')
+# Per player: chips and flags before the blinds, and the hole cards
+SEAT = struct.Struct('<dBBB')
+# Street (0 = preflop, ..., 3 = river), seat, action code and the player's betted chips after the action
+ACTION = struct.Struct('<BBBd')
+# Per player: chips after the pot is distributed and whether the player won
+RESULT = struct.Struct('<dB')
+
+NUMBER_OF_COMMUNITY_CARDS = 5
+STREETS = {0: 0, 3: 1, 4: 2, 5: 3}
+# Empty card slots, for players without hole cards and hands without all community cards
+NO_CARD = 0xFF
+# Seat flags
+IS_FOLDED = 1
+# Action codes are the index in ActionManager.ACTIONS, with the blinds flagged
+ACTIONS = ActionManager.ACTIONS
+ACTION_TO_CODE = {action: code for code, action in enumerate(ACTIONS)}
+IS_BLIND = 0x80
+
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+
+class ActionRecord(NamedTuple):
+    street: int
+    seat: int
+    action: str
+    is_blind: bool
+    betted_chips: float
+
+
+class HandRecord(NamedTuple):
+    starting_player_index: int
+    # Per seat, before the blinds
+    starting_chips: Tuple[float, ...]
+    is_folded: Tuple[bool, ...]
+    # Card indices. Players without chips are dealt no cards
+    hole_cards: Tuple[Tuple[int, ...], ...]
+    community_cards: Tuple[int, ...]
+    # The blinds and the actions the players chose, in order. The action a player chose is recorded, also when
+    # ActionManager turned it into an all-in
+    actions: Tuple[ActionRecord, ...]
+    # Per seat, after the pot is distributed
+    final_chips: Tuple[float, ...]
+    winners: Tuple[int, ...]
+
+
+class HandHistoryWriter:
+    """
+    Appends hands to a binary file: one record per hand, with a size field first so that readers can stream the file.
+    A hand is collected in memory while it is played, and goes through a large write buffer when it is over.
+    TexasHoldemRoundManager calls the record methods of the hand history writer of GameManager
+    """
+
+    def __init__(self, path: str, buffer_size=DEFAULT_BUFFER_SIZE) -> None:
+        self.path = path
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            # A hand cut off by an interrupted run is removed, so that the new hands follow the last complete one
+            with open(path, 'r+b') as file:
+                file.truncate(find_end_of_last_hand(file, path))
+        self.file: BinaryIO = open(path, 'ab', buffering=buffer_size)
+        if self.file.tell() == 0:
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION))
+        self.n_hands = 0
+        self.seats = bytearray()
+        self.actions = bytearray()
+        self.n_actions = 0
+        self.starting_player_index = 0
+
+    def start_hand(self, players, starting_player_index: int) -> None:
+        self.seats = bytearray()
+        self.actions = bytearray()
+        self.n_actions = 0
+        self.starting_player_index = starting_player_index
+        for player in players:
+            self.seats += SEAT.pack(player.chips, IS_FOLDED if player.is_folded else 0, NO_CARD, NO_CARD)
+
+    def record_hole_cards(self, players) -> None:
+        for seat, player in enumerate(players):
+            if player.hand:
+                offset = seat * SEAT.size + SEAT.size - 2
+                self.seats[offset:offset + 2] = bytes(card.index for card in player.hand)
+
+    def record_action(self, street: int, seat: int, action: str, betted_chips: float, is_blind=False) -> None:
+        code = ACTION_TO_CODE[action] | (IS_BLIND if is_blind else 0)
+        self.actions += ACTION.pack(STREETS[street], seat, code, betted_chips)
+        self.n_actions += 1
+
+    def end_hand(self, players, community_cards: List[Card], winners) -> None:
+        n_players = len(players)
+        cards = [card.index for card in community_cards]
+        cards += [NO_CARD] * (NUMBER_OF_COMMUNITY_CARDS - len(cards))
+        results = b''.join(RESULT.pack(player.chips, player in winners) for player in players)
+        record = b''.join([HAND_HEADER.pack(n_players, self.starting_player_index, self.n_actions),
+                           self.seats, bytes(cards), self.actions, results])
+        self.file.write(RECORD_SIZE.pack(len(record)))
+        self.file.write(record)
+        self.n_hands += 1
+
+    def flush(self) -> None:
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> 'HandHistoryWriter':
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.close()
+
+
+class NullHandHistoryWriter:
+    # Records nothing, for games without a hand history
+
+    def start_hand(self, players, starting_player_index: int) -> None:
+        pass
+
+    def record_hole_cards(self, players) -> None:
+        pass
+
+    def record_action(self, street: int, seat: int, action: str, betted_chips: float, is_blind=False) -> None:
+        pass
+
+    def end_hand(self, players, community_cards: List[Card], winners) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def check_file_header(file: BinaryIO, path: str) -> None:
+    header = file.read(FILE_HEADER.size)
+    if len(header) < FILE_HEADER.size or FILE_HEADER.unpack(header) != (MAGIC, VERSION):
+        raise ValueError(f'{path} is not a hand history file of version {VERSION}')
+
+
+def find_end_of_last_hand(file: BinaryIO, path: str) -> int:
+    # Follows the size fields from the file header, without reading the hands
+    check_file_header(file, path)
+    file_size = os.fstat(file.fileno()).st_size
+    end = FILE_HEADER.size
+    while end + RECORD_SIZE.size <= file_size:
+        file.seek(end)
+        record_end = end + RECORD_SIZE.size + RECORD_SIZE.unpack(file.read(RECORD_SIZE.size))[0]
+        if record_end > file_size:
+            break
+        end = record_end
+    return end
+
+
+def decode_hand(record: bytes) -> HandRecord:
+    n_players, starting_player_index, n_actions = HAND_HEADER.unpack_from(record)
+    offset = HAND_HEADER.size
+    seats = list(SEAT.iter_unpack(record[offset:offset + n_players * SEAT.size]))
+    offset += n_players * SEAT.size
+    community_cards = tuple(card for card in record[offset:offset + NUMBER_OF_COMMUNITY_CARDS] if card != NO_CARD)
+    offset += NUMBER_OF_COMMUNITY_CARDS
+    actions = tuple(ActionRecord(street, seat, ACTIONS[code & ~IS_BLIND], bool(code & IS_BLIND), betted_chips)
+                    for street, seat, code, betted_chips in ACTION.iter_unpack(record[offset:offset + n_actions * ACTION.size]))
+    offset += n_actions * ACTION.size
+    results = list(RESULT.iter_unpack(record[offset:offset + n_players * RESULT.size]))
+    return HandRecord(
+        starting_player_index,
+        tuple(chips for chips, _, _, _ in seats),
+        tuple(bool(flags & IS_FOLDED) for _, flags, _, _ in seats),
+        tuple(tuple(card for card in cards if card != NO_CARD) for _, _, *cards in seats),
+        community_cards,
+        actions,
+        tuple(chips for chips, _ in results),
+        tuple(seat for seat, (_, is_winner) in enumerate(results) if is_winner))
+
+
+class HandHistoryReader:
+    """
+    Streams the hands of a file written by HandHistoryWriter, one at a time. A hand cut off at the end of the file,
+    for example by an interrupted run, is skipped
+    """
+
+    def __init__(self, path: str, buffer_size=DEFAULT_BUFFER_SIZE) -> None:
+        self.path = path
+        self.buffer_size = buffer_size
+
+    def __iter__(self) -> Iterator[HandRecord]:
+        with open(self.path, 'rb', buffering=self.buffer_size) as file:
+            check_file_header(file, self.path)
+            while True:
+                size = file.read(RECORD_SIZE.size)
+                if len(size) < RECORD_SIZE.size:
+                    return
+                record_size, = RECORD_SIZE.unpack(size)
+                record = file.read(record_size)
+                if len(record) < record_size:
+                    return
+                yield decode_hand(record)
+
+
+def read_hand_histories(paths: List[str]) -> Iterator[HandRecord]:
+    # The hands of several files, for example one per simulator task, file by file
+    for path in paths:
+        yield from HandHistoryReader(path)
+
+
+def get_hand_history_paths(directory: str) -> List[str]:
+    return sorted(os.path.join(directory, file_name) for file_name in os.listdir(directory)
+                  if file_name.endswith('.hh'))
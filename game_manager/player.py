@@ -3,7 +3,7 @@ from .deck_manager import Card
 from .pivotal_parameters import pivotal_parameters as piv
 from resolvers.resolvers import DeepStackResolver, PureRolloutResolver
 
-import random
+import numpy as np
 
 
 class Player():
@@ -98,18 +98,26 @@ class HumanPlayer(Player):
 
 class AIPlayer(Player):
 
-    def __init__(self, chips=piv.starting_chips_per_player, hide_cards=False, probability_of_pure_rollout=1.0, risk_averseness=0.4):
+    def __init__(self, chips=piv.starting_chips_per_player, hide_cards=False, probability_of_pure_rollout=1.0, risk_averseness=0.4,
+                 pure_rollout_resolver=None, deepstack_resolver=None, rng=None):
+        # rng is a numpy Generator for the choice of resolver. The default resolvers draw their seeds from it
         super().__init__(chips, hide_cards=hide_cards)
+        self.rng = np.random.default_rng() if rng is None else rng
         self.probability_of_pure_rollout = probability_of_pure_rollout
-        self.pure_rollout_resolver = PureRolloutResolver()
-        self.deepstack_resolver = DeepStackResolver()
+        self.pure_rollout_resolver = PureRolloutResolver(seed=self.spawn_seed()) \
+            if pure_rollout_resolver is None else pure_rollout_resolver
+        self.deepstack_resolver = DeepStackResolver(rng=np.random.default_rng(self.spawn_seed())) \
+            if deepstack_resolver is None else deepstack_resolver
         self.risk_averseness = risk_averseness
 
     def action(self, state):
-        resolver = self.pure_rollout_resolver if random.random(
+        resolver = self.pure_rollout_resolver if self.rng.random(
         ) < self.probability_of_pure_rollout else self.deepstack_resolver
         action = resolver.choose_action(self, state)
         return action
 
+    def spawn_seed(self) -> int:
+        return int(self.rng.integers(1 << 63))
+
     # Action() - Must go throught algorithm before making move (needs betting aswell)
     pass
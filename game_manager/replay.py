@@ -0,0 +1,154 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from .game_manager import GameManager
+from .player import Player
+from .deck_manager import DeckManager, Card
+from .user_interface import NullUserInterface
+from poker_oracle.hands_evaluator.rank_evaluator import get_rank_tables
+from .hand_history import HandRecord, STREETS, get_hand_history_paths, read_hand_histories
+
+import argparse
+import os
+import time
+
+
+class ReplayResult(NamedTuple):
+    n_hands: int
+    # Position of each hand that was not replayed as recorded, counted from the first hand replayed
+    mismatched_hands: List[int]
+    # Time spent in the rules engine, without reading the hand histories
+    seconds: float
+
+    @property
+    def n_mismatches(self) -> int:
+        return len(self.mismatched_hands)
+
+    @property
+    def hands_per_second(self) -> float:
+        return self.n_hands / self.seconds
+
+
+class StackedDeckManager(DeckManager):
+    # Shuffling puts the recorded cards on top, in the order RoundManager deals them
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.stacked_cards: List[Card] = []
+
+    def shuffle_cards(self):
+        stacked_indices = {card.index for card in self.stacked_cards}
+        self.cards = self.stacked_cards + [card for card in self.cards if card.index not in stacked_indices]
+
+
+class ReplayPlayer(Player):
+    # Plays the action recorded for its seat
+
+    def __init__(self, hand_replayer: 'HandReplayer', seat: int) -> None:
+        super().__init__(0)
+        self.hand_replayer = hand_replayer
+        self.seat = seat
+
+    def action(self, state):
+        return self.hand_replayer.get_next_action(self.seat)
+
+
+class HandReplayer:
+    """
+    Plays recorded hands again through RoundManager, ActionManager, PotManager and HandsEvaluator, with the recorded
+    cards and actions, and checks that every bet, the winners and the final chips come out as recorded. Each hand
+    starts from its recorded chips, so one mismatch does not carry over to the next hands.
+    Replaying is also a benchmark of the game loop without the cost of AI decisions.
+
+    The replayer is the hand history writer of its GameManager, so it sees the actions and the result of the
+    replayed hand the same way HandHistoryWriter saw the recorded one
+    """
+
+    def __init__(self) -> None:
+        self.game_managers: Dict[int, GameManager] = {}
+        self.hand: Optional[HandRecord] = None
+        self.action_index = 0
+        self.is_matching = True
+
+    def get_game_manager(self, n_players: int) -> GameManager:
+        if n_players not in self.game_managers:
+            players = [ReplayPlayer(self, seat) for seat in range(n_players)]
+            game_manager = GameManager(players, NullUserInterface(), self)
+            game_manager.round_manager.deck_manager = StackedDeckManager()
+            self.game_managers[n_players] = game_manager
+        return self.game_managers[n_players]
+
+    def replay_hand(self, hand: HandRecord) -> bool:
+        # Returns whether the hand was played as recorded
+        game_manager = self.get_game_manager(len(hand.starting_chips))
+        for player, chips, is_folded in zip(game_manager.players, hand.starting_chips, hand.is_folded):
+            player.chips = chips
+            player.is_folded = is_folded
+            player.betted_chips = 0
+        round_manager = game_manager.round_manager
+        round_manager.starting_player_index = hand.starting_player_index
+        round_manager.deck_manager.stacked_cards = [
+            Card.from_index(card) for cards in hand.hole_cards for card in cards] + \
+            [Card.from_index(card) for card in hand.community_cards]
+
+        self.hand = hand
+        self.action_index = 0
+        self.is_matching = True
+        round_manager.play_round()
+        return self.is_matching and self.action_index == len(hand.actions)
+
+    def replay(self, hands: Iterable[HandRecord]) -> ReplayResult:
+        # The rank tables are built or loaded on first use, which would otherwise be timed with the first hand
+        get_rank_tables()
+        n_hands = 0
+        mismatched_hands = []
+        seconds = 0.0
+        for hand in hands:
+            start_time = time.perf_counter()
+            is_matching = self.replay_hand(hand)
+            seconds += time.perf_counter() - start_time
+            if not is_matching:
+                mismatched_hands.append(n_hands)
+            n_hands += 1
+        return ReplayResult(n_hands, mismatched_hands, seconds)
+
+    def get_next_action(self, seat: int) -> str:
+        # A player asking out of turn, or after the recorded actions, folds, which ends the hand soon
+        if self.action_index < len(self.hand.actions):
+            recorded_action = self.hand.actions[self.action_index]
+            if recorded_action.seat == seat and not recorded_action.is_blind:
+                return recorded_action.action
+        self.is_matching = False
+        return 'F'
+
+    # Called by TexasHoldemRoundManager, like the methods of HandHistoryWriter
+
+    def start_hand(self, players, starting_player_index: int) -> None:
+        pass
+
+    def record_hole_cards(self, players) -> None:
+        pass
+
+    def record_action(self, street: int, seat: int, action: str, betted_chips: float, is_blind=False) -> None:
+        if self.action_index >= len(self.hand.actions) or \
+                self.hand.actions[self.action_index] != (STREETS[street], seat, action, is_blind, betted_chips):
+            self.is_matching = False
+        self.action_index += 1
+
+    def end_hand(self, players, community_cards: List[Card], winners) -> None:
+        if tuple(player.chips for player in players) != self.hand.final_chips or \
+                tuple(seat for seat, player in enumerate(players) if player in winners) != self.hand.winners:
+            self.is_matching = False
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Replays recorded hands through the rules engine, checks the chip outcomes and reports hands/s')
+    parser.add_argument('paths', nargs='+', help='Hand history files, or directories of them')
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.paths:
+        paths += get_hand_history_paths(path) if os.path.isdir(path) else [path]
+    result = HandReplayer().replay(read_hand_histories(paths))
+    print(f'{result.n_hands} hands, {result.n_mismatches} mismatches, {result.hands_per_second:.1f} hands/s')
+    if result.mismatched_hands:
+        print(f'First mismatched hands: {result.mismatched_hands[:10]}')
@@ -0,0 +1,156 @@
+from typing import Callable, List, NamedTuple, Optional, Sequence
+from multiprocessing import Pool
+from .game_manager import GameManager
+from .player import Player, AIPlayer
+from .user_interface import NullUserInterface
+from .hand_history import HandHistoryWriter
+from .pivotal_parameters import pivotal_parameters as piv
+from resolvers.resolvers import PureRolloutResolver
+from poker_oracle.equity_cache import equity_cache
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+GAMES_PER_TASK = 10
+# Few rollouts and no time budget keep a decision in the order of milliseconds
+SIMULATION_MAX_ROLLOUTS = 200
+
+
+class SimulationResult(NamedTuple):
+    n_games: int
+    n_hands: int
+    # Per seat, summed over all games
+    chip_deltas: List[float]
+    # Per seat. A game stopped at max_hands is won by the players with the most chips, split evenly between them
+    wins: List[float]
+    seconds: float
+
+    @property
+    def win_rates(self) -> List[float]:
+        return [wins / self.n_games for wins in self.wins]
+
+    @property
+    def mean_chip_deltas(self) -> List[float]:
+        return [chip_delta / self.n_games for chip_delta in self.chip_deltas]
+
+    @property
+    def hands_per_second(self) -> float:
+        return self.n_hands / self.seconds if self.seconds > 0 else 0.0
+
+
+def create_rollout_player(rng: Optional[np.random.Generator] = None) -> Player:
+    # Default seat: an AIPlayer with a quiet, fast PureRolloutResolver. Without a time budget, the decisions only
+    # depend on rng
+    rng = np.random.default_rng() if rng is None else rng
+    return AIPlayer(hide_cards=True, rng=rng, pure_rollout_resolver=PureRolloutResolver(
+        max_rollouts=SIMULATION_MAX_ROLLOUTS, time_budget=None, verbose=False, seed=int(rng.integers(1 << 63))))
+
+
+def play_games(task) -> SimulationResult:
+    # Worker entry point. A task is (seat factories, n_games, max_hands, seed, hand history path or None). The seat
+    # factories are module-level functions, so that they can be sent to worker processes
+    seat_factories, n_games, max_hands, seed, hand_history_path = task
+    hand_history_writer = HandHistoryWriter(hand_history_path) if hand_history_path is not None else None
+    # Every game has its own streams for the deck and for each seat, so the result of a task only depends on its seed.
+    # Cached estimates from earlier tasks in the same process would make it depend on the order of the tasks
+    equity_cache.clear()
+    game_seed_sequences = np.random.SeedSequence(seed).spawn(n_games)
+    start_time = time.perf_counter()
+    n_hands = 0
+    chip_deltas = [0.0] * len(seat_factories)
+    wins = [0.0] * len(seat_factories)
+    for game_seed_sequence in game_seed_sequences:
+        deck_rng, *seat_rngs = [np.random.default_rng(seed_sequence)
+                                for seed_sequence in game_seed_sequence.spawn(1 + len(seat_factories))]
+        players = [seat_factory(seat_rng) for seat_factory, seat_rng in zip(seat_factories, seat_rngs)]
+        starting_chips = [player.chips for player in players]
+        game_manager = GameManager(players, NullUserInterface(), hand_history_writer, deck_rng)
+        n_game_hands = 0
+        while not game_manager.game_over() and (max_hands is None or n_game_hands < max_hands):
+            game_manager.round_manager.play_round()
+            n_game_hands += 1
+        n_hands += n_game_hands
+
+        most_chips = max(player.chips for player in players)
+        winners = [seat for seat, player in enumerate(players) if player.chips == most_chips]
+        for seat, player in enumerate(players):
+            chip_deltas[seat] += player.chips - starting_chips[seat]
+            if seat in winners:
+                wins[seat] += 1 / len(winners)
+    if hand_history_writer is not None:
+        hand_history_writer.close()
+    return SimulationResult(n_games, n_hands, chip_deltas, wins, time.perf_counter() - start_time)
+
+
+class SelfPlaySimulator:
+    """
+    Plays full games between AI players without a terminal: no HumanPlayer, and a NullUserInterface instead of the
+    screen. Games are split in tasks for a process pool, and the results of all tasks are summed per seat
+    """
+
+    def __init__(self, seat_factories: Optional[Sequence[Callable[[np.random.Generator], Player]]] = None, workers=1,
+                 games_per_task=GAMES_PER_TASK, max_hands=None, seed=None, hand_history_directory=None) -> None:
+        # seat_factories creates the player of each seat for every game from a numpy Generator of its own, by default
+        # piv.number_of_AI_players + 1 rollout players. The same seed gives the same results for any number of
+        # workers. max_hands stops a game early after that many hands. With hand_history_directory, every
+        # task appends its hands to its own file in the directory
+        self.seat_factories = list(seat_factories) if seat_factories is not None else \
+            [create_rollout_player] * (piv.number_of_human_players + piv.number_of_AI_players)
+        self.workers = workers
+        self.games_per_task = games_per_task
+        self.max_hands = max_hands
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.hand_history_directory = hand_history_directory
+        if hand_history_directory is not None:
+            os.makedirs(hand_history_directory, exist_ok=True)
+
+    def create_tasks(self, n_games):
+        n_tasks = -(-n_games // self.games_per_task)
+        tasks = []
+        for i, seed_sequence in enumerate(self.seed_sequence.spawn(n_tasks)):
+            n_task_games = min(self.games_per_task, n_games - i * self.games_per_task)
+            hand_history_path = os.path.join(self.hand_history_directory, f'hands_{i:06d}.hh') \
+                if self.hand_history_directory is not None else None
+            tasks.append((self.seat_factories, n_task_games, self.max_hands,
+                          int(seed_sequence.generate_state(1)[0]), hand_history_path))
+        return tasks
+
+    def run(self, n_games: int) -> SimulationResult:
+        if n_games < 1:
+            raise ValueError(f'At least one game is needed, not {n_games}')
+        start_time = time.perf_counter()
+        tasks = self.create_tasks(n_games)
+        if self.workers > 1 and len(tasks) > 1:
+            with Pool(min(self.workers, len(tasks))) as pool:
+                results = pool.map(play_games, tasks)
+        else:
+            results = [play_games(task) for task in tasks]
+
+        n_seats = len(self.seat_factories)
+        return SimulationResult(
+            sum(result.n_games for result in results),
+            sum(result.n_hands for result in results),
+            [sum(result.chip_deltas[seat] for result in results) for seat in range(n_seats)],
+            [sum(result.wins[seat] for result in results) for seat in range(n_seats)],
+            time.perf_counter() - start_time)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Plays games between AI players without a terminal and reports the results per seat')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--max-hands', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--hand-history', default=None, help='Directory to write the hands to')
+    args = parser.parse_args()
+
+    simulator = SelfPlaySimulator(workers=args.workers, max_hands=args.max_hands, seed=args.seed,
+                                  hand_history_directory=args.hand_history)
+    result = simulator.run(args.games)
+    print(f'{result.n_games} games, {result.n_hands} hands, {result.hands_per_second:.1f} hands/s')
+    for seat, (win_rate, mean_chip_delta) in enumerate(zip(result.win_rates, result.mean_chip_deltas)):
+        print(f'Seat {seat}: win rate {win_rate:.3f}, mean chip delta {mean_chip_delta:+.2f}')
@@ -1,6 +1,16 @@
+import os
+import tempfile
 import unittest
+import numpy as np
 from game_manager.game_manager import PotManager
 from game_manager.player import Player
+from game_manager.deck_manager import Card, DeckManager
+from game_manager.game_manager import GameManager
+from game_manager.pivotal_parameters import pivotal_parameters as piv
+from game_manager.user_interface import BaseUserInterface, NullUserInterface, RecordingUserInterface, RoundOverEvent, StateEvent
+from game_manager.simulator import SelfPlaySimulator, create_rollout_player
+from game_manager.replay import HandReplayer
+from game_manager.hand_history import HandHistoryReader, HandHistoryWriter, get_hand_history_paths, read_hand_histories
 
 
 class TestRulesManager(unittest.TestCase):
@@ -60,6 +70,149 @@ class TestRulesManager(unittest.TestCase):
         self.assertEqual(self.player4.chips, 140)
         self.assertEqual(self.player5.chips, 120)
 
+class TestDeckManager(unittest.TestCase):
+    def test_card_conversion(self):
+        card = Card('H', 'T')
+        self.assertEqual((card.suit, card.value), ('H', 'T'))
+        self.assertEqual(str(card), 'HT')
+        self.assertEqual(Card.from_string('HT'), card)
+        self.assertEqual(Card.from_index(card.index), card)
+        self.assertEqual(len({Card('S', 'A'), Card('S', 'A'), Card('C', 'A')}), 2)
+
+    def test_deck_without_cards(self):
+        invalid_cards = [Card('S', 'A'), Card('D', '2'), Card('C', '9')]
+        deck_manager = DeckManager(True, invalid_cards)
+        self.assertEqual(len(deck_manager.cards), 49)
+        self.assertFalse(any(card in invalid_cards for card in deck_manager.cards))
+        self.assertEqual(len(set(deck_manager.cards)), 49)
+
+    def test_seeded_shuffle(self):
+        decks = [DeckManager(rng=np.random.default_rng(seed)) for seed in [7, 7, 8]]
+        for deck_manager in decks:
+            deck_manager.shuffle_cards()
+        self.assertEqual(decks[0].cards, decks[1].cards)
+        self.assertNotEqual(decks[0].cards, decks[2].cards)
+        self.assertEqual(sorted(card.index for card in decks[0].cards), list(range(52)))
+
+
+class TestSelfPlaySimulator(unittest.TestCase):
+    def test_run(self):
+        result = SelfPlaySimulator(max_hands=3, games_per_task=2, seed=0).run(3)
+        self.assertEqual(result.n_games, 3)
+        self.assertLessEqual(result.n_hands, 9)
+        # Chips only move between the players
+        self.assertAlmostEqual(sum(result.chip_deltas), 0)
+        self.assertAlmostEqual(sum(result.wins), 3)
+        self.assertGreater(result.hands_per_second, 0)
+        with self.assertRaises(ValueError):
+            SelfPlaySimulator().run(0)
+
+    def test_reproducible(self):
+        # The same seed gives the same games, also when the tasks run in a process pool
+        serial = SelfPlaySimulator(max_hands=5, games_per_task=1, seed=4).run(2)
+        parallel = SelfPlaySimulator(max_hands=5, games_per_task=1, seed=4, workers=2).run(2)
+        self.assertEqual((serial.n_hands, serial.chip_deltas, serial.wins),
+                         (parallel.n_hands, parallel.chip_deltas, parallel.wins))
+
+
+class TestRecordingUserInterface(unittest.TestCase):
+    def test_record_and_replay(self):
+        recording_user_interface = RecordingUserInterface()
+        players = [create_rollout_player(), create_rollout_player()]
+        game_manager = GameManager(players, recording_user_interface)
+        game_manager.round_manager.play_round()
+        events = recording_user_interface.events
+        self.assertIsInstance(events[0], StateEvent)
+        self.assertIsInstance(events[-1], RoundOverEvent)
+        # The round is over before the pot is distributed
+        table = events[-1].table
+        self.assertEqual(sum(table.chips) + sum(table.betted_chips), 2 * piv.starting_chips_per_player)
+        self.assertTrue(all(len(hand) == 2 for hand in table.hands))
+
+        # Replaying the recording records the same events again
+        replayed_user_interface = RecordingUserInterface()
+        recording_user_interface.replay(replayed_user_interface)
+        self.assertEqual(replayed_user_interface.events, events)
+        recording_user_interface.replay(NullUserInterface())
+
+        self.assertEqual(recording_user_interface.drain(), events)
+        self.assertEqual(recording_user_interface.events, [])
+
+    def test_incomplete_backend(self):
+        class DisplayOnlyUserInterface(BaseUserInterface):
+            def display_state(self, players, community_cards, current_player_index=None, winners=[]):
+                pass
+
+        with self.assertRaises(TypeError):
+            DisplayOnlyUserInterface()
+
+    def test_max_events(self):
+        recording_user_interface = RecordingUserInterface(max_events=2)
+        players = [create_rollout_player(), create_rollout_player()]
+        for _ in range(3):
+            recording_user_interface.display_state(players, [])
+        self.assertEqual(len(recording_user_interface.events), 2)
+
+
+class TestHandHistory(unittest.TestCase):
+    def test_write_and_read(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'hands.hh')
+            # Seeded, so that the game is not over before the last hand
+            players = [create_rollout_player(np.random.default_rng(seed)) for seed in range(3)]
+            with HandHistoryWriter(path) as hand_history_writer:
+                game_manager = GameManager(players, NullUserInterface(), hand_history_writer, np.random.default_rng(3))
+                for _ in range(4):
+                    game_manager.round_manager.play_round()
+
+            hands = list(HandHistoryReader(path))
+            self.assertEqual(len(hands), 4)
+            self.assertEqual(hands[-1].final_chips, tuple(player.chips for player in players))
+            for hand, next_hand in zip(hands, hands[1:]):
+                self.assertEqual(hand.final_chips, next_hand.starting_chips)
+            for hand in hands:
+                self.assertAlmostEqual(sum(hand.final_chips), 3 * piv.starting_chips_per_player)
+                self.assertEqual([action.is_blind for action in hand.actions[:2]], [True, True])
+                self.assertTrue(hand.winners)
+                dealt_cards = [card for cards in hand.hole_cards for card in cards] + list(hand.community_cards)
+                self.assertEqual(len(dealt_cards), len(set(dealt_cards)))
+
+            # A hand cut off at the end is skipped by the reader, and removed before the writer appends
+            with open(path, 'ab') as file:
+                file.write(b'\x40\x00\x00\x00\x03')
+            self.assertEqual(len(list(HandHistoryReader(path))), 4)
+            with HandHistoryWriter(path) as hand_history_writer:
+                game_manager.set_hand_history_writer(hand_history_writer)
+                game_manager.round_manager.play_round()
+            self.assertEqual(len(list(HandHistoryReader(path))), 5)
+
+    def test_simulator_hand_history(self):
+        with tempfile.TemporaryDirectory() as directory:
+            result = SelfPlaySimulator(max_hands=2, games_per_task=1, seed=0,
+                                       hand_history_directory=directory).run(2)
+            paths = get_hand_history_paths(directory)
+            self.assertEqual(len(paths), 2)
+            self.assertEqual(len(list(read_hand_histories(paths))), result.n_hands)
+
+
+class TestHandReplayer(unittest.TestCase):
+    def test_replay(self):
+        with tempfile.TemporaryDirectory() as directory:
+            SelfPlaySimulator(max_hands=5, games_per_task=1, seed=1, hand_history_directory=directory).run(2)
+            hands = list(read_hand_histories(get_hand_history_paths(directory)))
+
+        result = HandReplayer().replay(hands)
+        self.assertEqual(result.n_hands, len(hands))
+        self.assertEqual(result.mismatched_hands, [])
+        self.assertGreater(result.hands_per_second, 0)
+
+        # Wrong chips after the hand, and a recorded action missing
+        hand = hands[0]
+        tampered_hands = [hand._replace(final_chips=(hand.final_chips[0] + 1,) + hand.final_chips[1:]),
+                          hand._replace(actions=hand.actions[:-1])]
+        self.assertEqual(HandReplayer().replay(hands[:1] + tampered_hands).mismatched_hands, [1, 2])
+
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -1,9 +1,30 @@
+from abc import ABC, abstractmethod
+from typing import List, NamedTuple, Optional, Tuple
 from .player import Player
 from .deck_manager import Card
 from .unicode import deck_matrix, chips, hidden_card
 
 
-class UserInterface():
+class BaseUserInterface(ABC):
+    """
+    Everything the game loop shows. UserInterface draws the table in the terminal, NullUserInterface shows nothing,
+    and RecordingUserInterface stores the events so that they can be replayed
+    """
+
+    @abstractmethod
+    def display_state(self, players, community_cards, current_player_index=None, winners=[]):
+        pass
+
+    @abstractmethod
+    def display_possible_actions(self, player, possible_actions, current_bet, raise_amount):
+        pass
+
+    @abstractmethod
+    def round_over(self, players, community_cards, winners):
+        pass
+
+
+class UserInterface(BaseUserInterface):
 
     WHITESPACE = ' ' * 4
 
@@ -97,6 +118,119 @@ class UserInterface():
         print('\n')
 
 
+class NullUserInterface(BaseUserInterface):
+    # Shows nothing and never waits for input, for games between AI players
+
+    def display_state(self, players, community_cards, current_player_index=None, winners=[]):
+        pass
+
+    def display_possible_actions(self, player, possible_actions, current_bet, raise_amount):
+        pass
+
+    def round_over(self, players, community_cards, winners):
+        pass
+
+
+class TableSnapshot(NamedTuple):
+    # Per player, by seat. Cards are card indices
+    hands: Tuple[Tuple[int, ...], ...]
+    chips: Tuple[float, ...]
+    betted_chips: Tuple[float, ...]
+    is_folded: Tuple[bool, ...]
+    community_cards: Tuple[int, ...]
+
+
+class StateEvent(NamedTuple):
+    table: TableSnapshot
+    current_player_index: Optional[int]
+    winners: Tuple[int, ...]
+
+
+class PossibleActionsEvent(NamedTuple):
+    seat: int
+    possible_actions: Tuple[str, ...]
+    current_bet: float
+    raise_amount: float
+
+
+class RoundOverEvent(NamedTuple):
+    table: TableSnapshot
+    winners: Tuple[int, ...]
+
+
+class RecordingUserInterface(BaseUserInterface):
+    """
+    Stores what would have been shown as tuples of card indices and chip counts, without rendering anything.
+    Players are identified by their seat in the list of players of the last display_state
+    """
+
+    def __init__(self, max_events=None) -> None:
+        # With max_events, only the latest max_events events are kept
+        self.max_events = max_events
+        self.events: List[NamedTuple] = []
+        self.players: List[Player] = []
+
+    def record(self, event):
+        self.events.append(event)
+        if self.max_events is not None and len(self.events) > self.max_events:
+            del self.events[:len(self.events) - self.max_events]
+
+    def create_table_snapshot(self, players, community_cards) -> TableSnapshot:
+        self.players = players
+        return TableSnapshot(tuple(tuple(card.index for card in player.hand) for player in players),
+                             tuple(player.chips for player in players),
+                             tuple(player.betted_chips for player in players),
+                             tuple(player.is_folded for player in players),
+                             tuple(card.index for card in community_cards))
+
+    def get_seats(self, players) -> Tuple[int, ...]:
+        return tuple(seat for seat, player in enumerate(self.players) if player in players)
+
+    def display_state(self, players, community_cards, current_player_index=None, winners=[]):
+        table = self.create_table_snapshot(players, community_cards)
+        self.record(StateEvent(table, current_player_index, self.get_seats(winners)))
+
+    def display_possible_actions(self, player, possible_actions, current_bet, raise_amount):
+        self.record(PossibleActionsEvent(self.players.index(player), tuple(possible_actions),
+                                         current_bet, raise_amount))
+
+    def round_over(self, players, community_cards, winners):
+        table = self.create_table_snapshot(players, community_cards)
+        self.record(RoundOverEvent(table, self.get_seats(winners)))
+
+    def drain(self) -> List[NamedTuple]:
+        # Returns the recorded events and starts a new recording
+        events = self.events
+        self.events = []
+        return events
+
+    def create_players(self, table: TableSnapshot) -> List[Player]:
+        players = []
+        for hand, player_chips, betted_chips, is_folded in zip(table.hands, table.chips, table.betted_chips, table.is_folded):
+            player = Player(player_chips)
+            player.hand = [Card.from_index(card) for card in hand]
+            player.betted_chips = betted_chips
+            player.is_folded = is_folded
+            players.append(player)
+        return players
+
+    def replay(self, user_interface: BaseUserInterface, events=None):
+        # Shows the events on another user interface, for example UserInterface to watch a simulated game
+        players = []
+        for event in self.events if events is None else events:
+            if isinstance(event, PossibleActionsEvent):
+                user_interface.display_possible_actions(players[event.seat], list(event.possible_actions),
+                                                        event.current_bet, event.raise_amount)
+                continue
+            players = self.create_players(event.table)
+            community_cards = [Card.from_index(card) for card in event.table.community_cards]
+            winners = [players[seat] for seat in event.winners]
+            if isinstance(event, StateEvent):
+                user_interface.display_state(players, community_cards, event.current_player_index, winners)
+            else:
+                user_interface.round_over(players, community_cards, winners)
+
+
 if __name__ == '__main__':
     # torstein = Player()
     # torstein.recieve_cards([Card('S', '3'), Card('S', '8')])
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+from poker_oracle.suit_isomorphism import canonical_index
+
+import threading
+
+
+class EquityCache:
+    """
+    Bounded, thread-safe LRU cache of win probability estimates.
+    Keys are the suit-isomorphic canonical form of (hole cards, community cards, number of opponents),
+    so equivalent situations share one entry.
+    """
+
+    def __init__(self, maxsize=100000) -> None:
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def create_key(self, hole_cards, community_cards, n_opponents):
+        return (canonical_index([card.index for card in hole_cards], [card.index for card in community_cards]), n_opponents)
+
+    def get(self, key, is_usable=None):
+        # is_usable(value) can reject an entry, e.g. one that is not precise enough. That counts as a miss
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None or (is_usable is not None and not is_usable(value)):
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries), 'maxsize': self.maxsize}
+
+
+# Shared by all resolvers in the process
+equity_cache = EquityCache()
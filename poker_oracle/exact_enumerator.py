@@ -0,0 +1,70 @@
+from typing import List, Optional
+from itertools import combinations
+from math import comb
+from game_manager.deck_manager import NUMBER_OF_CARDS
+from poker_oracle.hands_evaluator.rank_evaluator import evaluate_card_indices_batch
+from poker_oracle.rollout_sampler import NUMBER_OF_COMMUNITY_CARDS
+from poker_oracle.hole_pairs import get_hole_pair_index
+
+import numpy as np
+
+
+class ExactEnumerator:
+    """
+    Heads-up win probability without sampling: every remaining board is combined with every opponent
+    hole pair that does not share a card with it, and all the hands are scored with the batch evaluator.
+    With an opponent range, each opponent hole pair counts with its weight in the range.
+    """
+
+    def __init__(self, hole_cards: List[int], community_cards: List[int], opponent_range: Optional[np.ndarray] = None) -> None:
+        self.opponent_range = opponent_range
+        known_cards = set(hole_cards) | set(community_cards)
+        self.hole_cards = list(hole_cards)
+        self.community_cards = list(community_cards)
+        self.remaining_cards = np.array([card for card in range(
+            NUMBER_OF_CARDS) if card not in known_cards])
+        self.n_public_cards_to_deal = NUMBER_OF_COMMUNITY_CARDS - \
+            len(community_cards)
+
+    def count_evaluations(self) -> int:
+        # One evaluation of player 1 per board, and one per opponent hole pair per board
+        n_boards = comb(len(self.remaining_cards), self.n_public_cards_to_deal)
+        n_opponent_hole_pairs = comb(
+            len(self.remaining_cards) - self.n_public_cards_to_deal, 2)
+        return n_boards * (1 + n_opponent_hole_pairs)
+
+    def evaluate_win_probability(self) -> float:
+        n_public_cards_to_deal = self.n_public_cards_to_deal
+        n_boards = comb(len(self.remaining_cards), n_public_cards_to_deal)
+        boards = np.array(list(combinations(self.remaining_cards, n_public_cards_to_deal)),
+                          dtype=np.int64).reshape(n_boards, n_public_cards_to_deal)
+
+        player_cards = np.hstack(
+            [np.tile(self.hole_cards + self.community_cards, (n_boards, 1)), boards])
+        player_strengths = evaluate_card_indices_batch(player_cards)
+
+        # Every (board, opponent hole pair) combination without shared cards
+        hole_pair_index = get_hole_pair_index()
+        is_possible_hole_pair = hole_pair_index.get_possible_hole_pairs(
+            self.hole_cards + self.community_cards)
+        opponent_hole_pairs = hole_pair_index.hole_pair_cards[is_possible_hole_pair]
+        card_is_on_board = np.zeros((n_boards, NUMBER_OF_CARDS), dtype=bool)
+        card_is_on_board[np.arange(n_boards)[:, None], boards] = True
+        is_possible = ~(card_is_on_board[:, opponent_hole_pairs[:, 0]]
+                        | card_is_on_board[:, opponent_hole_pairs[:, 1]])
+        board_indices, hole_pair_indices = np.nonzero(is_possible)
+
+        opponent_cards = np.hstack([opponent_hole_pairs[hole_pair_indices],
+                                    np.tile(self.community_cards, (len(board_indices), 1)).astype(np.int64),
+                                    boards[board_indices]])
+        opponent_strengths = evaluate_card_indices_batch(opponent_cards)
+
+        player_strengths = player_strengths[board_indices]
+        won_pots = (player_strengths > opponent_strengths) + \
+            0.5 * (player_strengths == opponent_strengths)
+        if self.opponent_range is None:
+            return float(won_pots.mean())
+        weights = np.asarray(self.opponent_range, dtype=np.float64)[is_possible_hole_pair][hole_pair_indices]
+        if weights.sum() <= 0:
+            raise ValueError('The opponent range has no hole pairs without shared cards')
+        return float(np.dot(won_pots, weights) / weights.sum())
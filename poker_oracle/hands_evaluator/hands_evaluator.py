@@ -2,6 +2,9 @@ from typing import Dict, List
 # from game_manager.player import Player
 from game_manager.deck_manager import Card
 from .utils import *
+from .rank_evaluator import evaluate_cards, evaluate_card_indices_batch
+
+import numpy as np
 
 
 class HandsEvaluator():
@@ -13,68 +16,23 @@ class HandsEvaluator():
         return {player: self.sort_on_value(
             player.hand + community_cards) for player in players}
 
-    def get_winner(self, players, community_cards=[]):
-
-        player_cards = self.create_player_card_dictionary(
-            players, community_cards)
-
-        # check if someone or multiple people have royal flush
-        players_with_royal_flush = self.get_players_with_royal_flush(
-            player_cards)
-        if len(players_with_royal_flush) > 0:
-            return players_with_royal_flush
-
-        # check if someone or multiple people have straight flush
-        players_with_straight_flush = self.get_players_with_best_straight_flush(
-            player_cards)
-        if len(players_with_straight_flush) > 0:
-            return players_with_straight_flush
-
-        # check if someone or multiple people have 4 of a kind
-        players_with_4oak = self.get_players_with_best_4oak_hand(player_cards)
-        if len(players_with_4oak) > 0:
-            return players_with_4oak
-
-        # # check if someone or multiple people have full house
-        players_with_full_house = self.get_players_with_best_full_house(
-            player_cards)
-        if len(players_with_full_house) > 0:
-            return players_with_full_house
-
-        # # check if someone or multiple people have flush
-        players_with_flush = self.get_players_with_best_flush(player_cards)
-        if len(players_with_flush) > 0:
-            return players_with_flush
-
-        # # check if someone or multiple people have straight
-        players_with_straight = self.get_players_with_best_straight(
-            player_cards)
-        if len(players_with_straight) > 0:
-            return players_with_straight
+    def get_hand_strength(self, cards: List[Card]) -> int:
+        # A stronger hand always gets a larger integer
+        return evaluate_cards(cards)
 
-        # check if someone or multiple people have 3 of a kind
-        players_with_3oak = self.get_players_with_best_3oak(player_cards)
-        if len(players_with_3oak) > 0:
-            return players_with_3oak
+    def evaluate_batch(self, cards: np.ndarray) -> np.ndarray:
+        # Strengths of N hands given as an (N, 5..7) array of cards encoded as integers 0..51
+        return evaluate_card_indices_batch(cards)
 
-        # # check if someone or multiple people have 2 pairs
-        players_with_two_pairs = self.get_players_with_best_two_pairs(
-            player_cards)
-        if len(players_with_two_pairs) > 0:
-            return players_with_two_pairs
+    def get_winner(self, players, community_cards=[]):
+        if not players:
+            return []
 
-        # # check if someone or multiple people have one pair
-        players_with_one_pair = self.get_players_with_best_one_pair(
-            player_cards)
-        if len(players_with_one_pair) > 0:
-            return players_with_one_pair
+        player_strengths = [self.get_hand_strength(
+            player.hand + community_cards) for player in players]
+        best_strength = max(player_strengths)
 
-        # # check if someone or multiple people have high card
-        players_with_high_card = self.get_players_with_best_high_card(
-            player_cards)
-        if len(players_with_high_card) > 0:
-            return players_with_high_card
-        return players
+        return [player for player, strength in zip(players, player_strengths) if strength == best_strength]
 
     def check_straight_flush_from_start_card(self, cards: List[Card], min_value: int, max_value: int):
         previous_value = max_value
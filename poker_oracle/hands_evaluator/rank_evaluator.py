@@ -0,0 +1,282 @@
+from typing import Dict, List, Sequence, Tuple
+from functools import lru_cache
+from game_manager.deck_manager import Card
+
+import os
+import numpy as np
+
+# Hand categories from worst to best. A royal flush is the highest straight flush
+HIGH_CARD = 0
+ONE_PAIR = 1
+TWO_PAIR = 2
+THREE_OF_A_KIND = 3
+STRAIGHT = 4
+FLUSH = 5
+FULL_HOUSE = 6
+FOUR_OF_A_KIND = 7
+STRAIGHT_FLUSH = 8
+
+NUMBER_OF_RANKS = 13
+NUMBER_OF_SUITS = 4
+
+# Cards are evaluated by their integer index 0..51 (Card.index): rank index in the upper bits, suit in the two lowest
+
+# Every multiset of 5, 6 or 7 ranks (max 4 of each) has a unique sum of these keys,
+# so the sum is a perfect hash of the ranks in a hand
+RANK_KEYS = [0, 1, 5, 22, 98, 453, 2031, 8698,
+             22854, 83661, 262349, 636345, 1479181]
+# The sum of up to 7 suit keys tells how many cards there are of each suit
+SUIT_KEYS = [0, 1, 8, 57]
+
+# Layout of a hand key: | rank key sum | number of cards (3 bits) | suit key sum (9 bits) |
+SUIT_BITS = 9
+COUNT_BITS = 3
+RANK_SHIFT = SUIT_BITS + COUNT_BITS
+SUIT_AND_COUNT_MASK = (1 << RANK_SHIFT) - 1
+
+CARD_KEYS = [(RANK_KEYS[card >> 2] << RANK_SHIFT) + (1 << SUIT_BITS) + SUIT_KEYS[card & 3]
+             for card in range(NUMBER_OF_RANKS * NUMBER_OF_SUITS)]
+
+CARD_KEY_ARRAY = np.array(CARD_KEYS, dtype=np.int64)
+
+# Number of hands scored at a time by evaluate_card_indices_batch, to bound the temporary arrays
+BATCH_CHUNK_SIZE = 1 << 18
+
+# A-2-3-4-5
+WHEEL_MASK = 0b1000000001111
+
+# Generated once with `make rank_table`, shared by all processes through a memory map
+RANK_TABLE_PATH = os.path.join(os.path.dirname(__file__), 'rank_table.npy')
+
+
+def encode_strength(category: int, ranks: Sequence[int]) -> int:
+    # Category followed by up to five ranks, one nibble each, so that a stronger hand is a larger integer
+    strength = category
+    for i in range(5):
+        strength = (strength << 4) | (ranks[i] if i < len(ranks) else 0)
+    return strength
+
+
+def get_category(strength: int) -> int:
+    return strength >> 20
+
+
+def get_straight_high_rank(rank_mask: int) -> int:
+    # Returns the rank index of the highest card in the best straight, or -1 if there is none
+    for high_rank in range(NUMBER_OF_RANKS - 1, 3, -1):
+        straight_mask = 0b11111 << (high_rank - 4)
+        if rank_mask & straight_mask == straight_mask:
+            return high_rank
+    if rank_mask & WHEEL_MASK == WHEEL_MASK:
+        return 3
+    return -1
+
+
+def evaluate_rank_counts(rank_counts: Sequence[int]) -> int:
+    # Strength of the best hand that is not a flush, given the number of cards of each rank
+    ranks = [rank for rank in range(NUMBER_OF_RANKS - 1, -1, -1)
+             if rank_counts[rank]]
+    quads = [rank for rank in ranks if rank_counts[rank] == 4]
+    trips = [rank for rank in ranks if rank_counts[rank] == 3]
+    pairs = [rank for rank in ranks if rank_counts[rank] == 2]
+
+    def kickers(excluded, n):
+        return [rank for rank in ranks if rank not in excluded][:n]
+
+    if quads:
+        return encode_strength(FOUR_OF_A_KIND, [quads[0]] + kickers(quads[:1], 1))
+
+    if trips and (len(trips) > 1 or pairs):
+        pair = max(trips[1:] + pairs)
+        return encode_strength(FULL_HOUSE, [trips[0], pair])
+
+    rank_mask = 0
+    for rank in ranks:
+        rank_mask |= 1 << rank
+    straight_high_rank = get_straight_high_rank(rank_mask)
+    if straight_high_rank >= 0:
+        return encode_strength(STRAIGHT, [straight_high_rank])
+
+    if trips:
+        return encode_strength(THREE_OF_A_KIND, [trips[0]] + kickers(trips, 2))
+    if len(pairs) >= 2:
+        return encode_strength(TWO_PAIR, pairs[:2] + kickers(pairs[:2], 1))
+    if pairs:
+        return encode_strength(ONE_PAIR, pairs + kickers(pairs, 3))
+    return encode_strength(HIGH_CARD, ranks[:5])
+
+
+def evaluate_flush_mask(rank_mask: int) -> int:
+    # Strength of the best hand made from the cards of one suit. Masks with less than 5 cards are no flush
+    ranks = [rank for rank in range(NUMBER_OF_RANKS - 1, -1, -1)
+             if rank_mask >> rank & 1]
+    if len(ranks) < 5:
+        return 0
+    straight_high_rank = get_straight_high_rank(rank_mask)
+    if straight_high_rank >= 0:
+        return encode_strength(STRAIGHT_FLUSH, [straight_high_rank])
+    return encode_strength(FLUSH, ranks[:5])
+
+
+def generate_rank_multisets(n_cards: int, lowest_rank: int = 0):
+    # All the ways of holding n_cards ranks, with at most 4 cards of the same rank
+    if n_cards == 0:
+        yield []
+        return
+    for rank in range(lowest_rank, NUMBER_OF_RANKS):
+        for rest in generate_rank_multisets(n_cards - 1, rank):
+            if rest.count(rank) < 4:
+                yield [rank] + rest
+
+
+def build_flush_table() -> List[int]:
+    return [evaluate_flush_mask(rank_mask) for rank_mask in range(1 << NUMBER_OF_RANKS)]
+
+
+def build_flush_suit_table() -> List[int]:
+    # Maps number of cards + suit key sum to the suit with at least 5 cards, or -1
+    flush_suit_table = [-1] * (1 << RANK_SHIFT)
+    for n_cards in range(8):
+        for n_1 in range(n_cards + 1):
+            for n_2 in range(n_cards - n_1 + 1):
+                for n_3 in range(n_cards - n_1 - n_2 + 1):
+                    suit_counts = [n_cards - n_1 - n_2 - n_3, n_1, n_2, n_3]
+                    key = (n_cards << SUIT_BITS) + \
+                        sum(SUIT_KEYS[suit] * count for suit, count in enumerate(suit_counts))
+                    for suit, count in enumerate(suit_counts):
+                        if count >= 5:
+                            flush_suit_table[key] = suit
+    return flush_suit_table
+
+
+def build_rank_table() -> Dict[int, int]:
+    # Maps rank key sum + number of cards to the strength of the best non-flush hand
+    rank_table = {}
+    for n_cards in range(5, 8):
+        for ranks in generate_rank_multisets(n_cards):
+            rank_counts = [0] * NUMBER_OF_RANKS
+            for rank in ranks:
+                rank_counts[rank] += 1
+            key = sum(RANK_KEYS[rank] for rank in ranks) << COUNT_BITS | n_cards
+            rank_table[key] = evaluate_rank_counts(rank_counts)
+    return rank_table
+
+
+def build_rank_arrays() -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Flush table, flush suit table and the rank table as sorted keys with their strengths
+    rank_table = build_rank_table()
+    rank_keys = np.array(sorted(rank_table), dtype=np.int32)
+    rank_strengths = np.array([rank_table[key]
+                              for key in rank_keys.tolist()], dtype=np.int32)
+    return (np.array(build_flush_table(), dtype=np.int32),
+            np.array(build_flush_suit_table(), dtype=np.int32),
+            rank_keys, rank_strengths)
+
+
+def write_rank_table(path: str = RANK_TABLE_PATH):
+    # All tables are stored back to back in one int32 array, the rank keys and strengths have the same length
+    flush_table, flush_suit_table, rank_keys, rank_strengths = build_rank_arrays()
+    np.save(path, np.concatenate(
+        [flush_table, flush_suit_table, rank_keys, rank_strengths]))
+
+
+def load_rank_table(path: str = RANK_TABLE_PATH):
+    # Returns views into a read-only memory map, or None if the file is missing or has an unexpected layout
+    if not os.path.exists(path):
+        return None
+    try:
+        table = np.load(path, mmap_mode='r')
+    except ValueError:
+        return None
+
+    n_flush = 1 << NUMBER_OF_RANKS
+    n_flush_suit = 1 << RANK_SHIFT
+    n_rank_keys = (len(table) - n_flush - n_flush_suit) // 2
+    if table.dtype != np.int32 or table.ndim != 1 or n_rank_keys <= 0 or \
+            n_flush + n_flush_suit + 2 * n_rank_keys != len(table):
+        return None
+
+    rank_keys_start = n_flush + n_flush_suit
+    return (table[:n_flush],
+            table[n_flush:rank_keys_start],
+            table[rank_keys_start:rank_keys_start + n_rank_keys],
+            table[rank_keys_start + n_rank_keys:])
+
+
+@lru_cache(maxsize=None)
+def get_rank_arrays() -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Uses the table on disk when it has been generated, otherwise the tables are computed
+    rank_arrays = load_rank_table()
+    return rank_arrays if rank_arrays is not None else build_rank_arrays()
+
+
+@lru_cache(maxsize=None)
+def get_rank_tables() -> Tuple[List[int], List[int], Dict[int, int]]:
+    # Plain python versions of the rank arrays, since indexing lists is faster when evaluating one hand at a time.
+    # They are private copies in every process: only the batch path reads the shared pages of the memory-mapped
+    # table. Looking up one hand in the numpy arrays is about 25 times slower, which rollouts can not afford
+    flush_table, flush_suit_table, rank_keys, rank_strengths = get_rank_arrays()
+    return (flush_table.tolist(), flush_suit_table.tolist(),
+            dict(zip(rank_keys.tolist(), rank_strengths.tolist())))
+
+
+def evaluate_card_indices(cards: Sequence[int]) -> int:
+    # Returns the strength of the best 5-card hand among 5 to 7 cards encoded as integers 0..51
+    flush_table, flush_suit_table, rank_table = get_rank_tables()
+
+    key = 0
+    for card in cards:
+        key += CARD_KEYS[card]
+
+    flush_suit = flush_suit_table[key & SUIT_AND_COUNT_MASK]
+    if flush_suit < 0:
+        return rank_table[key >> SUIT_BITS]
+
+    # With at most 7 cards a flush can not be combined with a full house or four of a kind
+    flush_mask = 0
+    for card in cards:
+        if card & 3 == flush_suit:
+            flush_mask |= 1 << (card >> 2)
+    return flush_table[flush_mask]
+
+
+def evaluate_cards(cards: List[Card]) -> int:
+    return evaluate_card_indices([card.index for card in cards])
+
+
+def evaluate_card_indices_batch(cards: np.ndarray) -> np.ndarray:
+    # Vectorized evaluate_card_indices. Takes an (N, 5..7) array of cards encoded as integers 0..51, of any integer
+    # dtype. The rank bits are shifted in intp, since int8 and uint8 overflow from the rank 7 on
+    cards = np.asarray(cards, dtype=np.intp)
+    if cards.ndim != 2 or not 5 <= cards.shape[1] <= 7:
+        raise ValueError(
+            f'Expected an array of shape (N, 5..7), got {cards.shape}')
+
+    strengths = np.empty(len(cards), dtype=np.int32)
+    for start in range(0, len(cards), BATCH_CHUNK_SIZE):
+        chunk = cards[start:start + BATCH_CHUNK_SIZE]
+        strengths[start:start + len(chunk)] = _evaluate_chunk(chunk)
+    return strengths
+
+
+def _evaluate_chunk(cards: np.ndarray) -> np.ndarray:
+    flush_table, flush_suit_table, rank_keys, rank_strengths = get_rank_arrays()
+
+    keys = CARD_KEY_ARRAY[cards].sum(axis=1)
+    strengths = rank_strengths[np.searchsorted(rank_keys, keys >> SUIT_BITS)]
+
+    flush_suits = flush_suit_table[keys & SUIT_AND_COUNT_MASK]
+    is_flush = flush_suits >= 0
+    if is_flush.any():
+        flush_cards = cards[is_flush]
+        in_flush_suit = (flush_cards & 3) == flush_suits[is_flush, None]
+        # The cards are distinct, so summing the rank bits is the same as or-ing them
+        flush_masks = np.where(
+            in_flush_suit, 1 << (flush_cards >> 2), 0).sum(axis=1)
+        strengths[is_flush] = flush_table[flush_masks]
+    return strengths
+
+
+if __name__ == '__main__':
+    write_rank_table()
+    print(f'Wrote {RANK_TABLE_PATH}')
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from itertools import combinations
+from poker_oracle.hands_evaluator.rank_evaluator import evaluate_cards, evaluate_card_indices, evaluate_card_indices_batch, get_category, get_rank_arrays, write_rank_table, load_rank_table, STRAIGHT_FLUSH, FULL_HOUSE, STRAIGHT, TWO_PAIR, HIGH_CARD
+from poker_oracle.hands_evaluator.hands_evaluator import HandsEvaluator
+from game_manager.deck_manager import Card
+
+
+class TestRankEvaluator(unittest.TestCase):
+
+    def test_categories(self):
+        royal_flush = [Card('H', 'A'), Card('H', 'K'), Card('H', 'Q'),
+                       Card('H', 'J'), Card('H', 'T'), Card('S', '2'), Card('D', '2')]
+        self.assertEqual(get_category(
+            evaluate_cards(royal_flush)), STRAIGHT_FLUSH)
+
+        full_house = [Card('D', 'K'), Card('H', 'K'), Card('C', 'K'),
+                      Card('S', '9'), Card('C', '9'), Card('H', '9')]
+        self.assertEqual(get_category(evaluate_cards(full_house)), FULL_HOUSE)
+
+        wheel = [Card('S', 'A'), Card('H', '2'), Card('D', '3'),
+                 Card('C', '4'), Card('S', '5')]
+        self.assertEqual(get_category(evaluate_cards(wheel)), STRAIGHT)
+
+        three_pairs = [Card('S', 'A'), Card('H', 'A'), Card('D', '3'),
+                       Card('C', '3'), Card('S', '5'), Card('D', '5'), Card('D', 'K')]
+        self.assertEqual(get_category(evaluate_cards(three_pairs)), TWO_PAIR)
+
+        high_card = [Card('S', 'A'), Card('H', '2'), Card('D', '3'),
+                     Card('C', '4'), Card('S', '7')]
+        self.assertEqual(get_category(evaluate_cards(high_card)), HIGH_CARD)
+
+    def test_ordering(self):
+        # The wheel is the lowest straight, a six high straight beats it
+        wheel = [Card('S', 'A'), Card('H', '2'), Card('D', '3'),
+                 Card('C', '4'), Card('S', '5')]
+        six_high = [Card('S', '6'), Card('H', '2'), Card('D', '3'),
+                    Card('C', '4'), Card('S', '5')]
+        self.assertGreater(evaluate_cards(six_high), evaluate_cards(wheel))
+
+        # Same pair, decided by the last kicker
+        pair_with_better_kicker = [Card('S', 'Q'), Card('H', 'Q'), Card('D', '9'),
+                                   Card('C', '7'), Card('S', '5')]
+        pair_with_worse_kicker = [Card('D', 'Q'), Card('C', 'Q'), Card('H', '9'),
+                                  Card('S', '7'), Card('H', '4')]
+        self.assertGreater(evaluate_cards(pair_with_better_kicker),
+                           evaluate_cards(pair_with_worse_kicker))
+
+    def test_best_five_of_seven(self):
+        seven_cards = [51, 44, 30, 29, 12, 7, 2]
+        best_of_five = max(evaluate_card_indices(cards)
+                           for cards in combinations(seven_cards, 5))
+        self.assertEqual(evaluate_card_indices(seven_cards), best_of_five)
+
+    def test_distinct_five_card_hands(self):
+        strengths = set(evaluate_card_indices(cards)
+                        for cards in combinations(range(52), 5))
+        self.assertEqual(len(strengths), 7462)
+
+    def test_evaluate_batch(self):
+        rng = np.random.default_rng(0)
+        cards = np.array([rng.choice(52, 7, replace=False)
+                         for _ in range(2000)])
+        hands_evaluator = HandsEvaluator()
+        for n_cards in range(5, 8):
+            strengths = hands_evaluator.evaluate_batch(cards[:, :n_cards])
+            self.assertEqual(strengths.tolist(), [evaluate_card_indices(
+                hand) for hand in cards[:, :n_cards].tolist()])
+
+        with self.assertRaises(ValueError):
+            hands_evaluator.evaluate_batch(cards[:, :4])
+
+    def test_evaluate_batch_small_dtypes(self):
+        # Boards are stored as int8, where shifting the rank bits in the card dtype would overflow
+        rng = np.random.default_rng(1)
+        cards = np.array([rng.choice(52, 7, replace=False)
+                         for _ in range(2000)])
+        expected = [evaluate_card_indices(hand) for hand in cards.tolist()]
+        for dtype in [np.int8, np.uint8]:
+            self.assertEqual(evaluate_card_indices_batch(cards.astype(dtype)).tolist(), expected)
+
+    def test_rank_table_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'rank_table.npy')
+            self.assertIsNone(load_rank_table(path))
+
+            write_rank_table(path)
+            loaded_arrays = load_rank_table(path)
+            for loaded_array, array in zip(loaded_arrays, get_rank_arrays()):
+                self.assertEqual(loaded_array.tolist(), array.tolist())
+            del loaded_arrays
+
+
+if __name__ == '__main__':
+    unittest.main()
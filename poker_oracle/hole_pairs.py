@@ -0,0 +1,83 @@
+from typing import List, Sequence
+from functools import lru_cache
+from game_manager.deck_manager import Card, NUMBER_OF_CARDS
+
+import numpy as np
+
+NUMBER_OF_HOLE_PAIRS = 1326
+# Every card is in a hole pair with each of the other 51 cards
+HOLE_PAIRS_PER_CARD = NUMBER_OF_CARDS - 1
+
+
+class HolePairIndex:
+    """
+    Lookup tables for the 1326 hole pairs, shared by everything that works with ranges or utility matrices.
+    Hole pairs are numbered in the order of MonteCarlo.get_all_possible_hole_pairs: cards sorted on suit ('C', 'D', 'H', 'S')
+    and then value, and pairs (i, j) with i < j in that order, i.e. ['C2C3', 'C2C4', ...]
+    """
+
+    def __init__(self) -> None:
+        sorted_card_strings = [suit + value for suit in ['C', 'D', 'H', 'S']
+                               for value in ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']]
+        sorted_cards = [Card.from_string(card_string).index for card_string in sorted_card_strings]
+
+        self.hole_pair_strings: List[str] = []
+        hole_pair_cards = []
+        for i in range(len(sorted_cards)):
+            for j in range(i + 1, len(sorted_cards)):
+                self.hole_pair_strings.append(
+                    sorted_card_strings[i] + sorted_card_strings[j])
+                hole_pair_cards.append((sorted_cards[i], sorted_cards[j]))
+        assert len(self.hole_pair_strings) == NUMBER_OF_HOLE_PAIRS
+
+        self.hole_pair_string_to_index = {hole_pair_string: index for index,
+                                          hole_pair_string in enumerate(self.hole_pair_strings)}
+
+        # (1326, 2) card indices of each hole pair
+        self.hole_pair_cards = np.array(hole_pair_cards, dtype=np.int64)
+
+        # (52, 52) hole pair index of two card indices, -1 on the diagonal
+        self.card_pair_to_index = np.full(
+            (NUMBER_OF_CARDS, NUMBER_OF_CARDS), -1, dtype=np.int64)
+        self.card_pair_to_index[self.hole_pair_cards[:, 0],
+                                self.hole_pair_cards[:, 1]] = np.arange(NUMBER_OF_HOLE_PAIRS)
+        self.card_pair_to_index[self.hole_pair_cards[:, 1],
+                                self.hole_pair_cards[:, 0]] = np.arange(NUMBER_OF_HOLE_PAIRS)
+
+        # (52, 51) indices of the hole pairs that contain each card
+        self.hole_pairs_with_card = np.array([np.delete(self.card_pair_to_index[card], card)
+                                              for card in range(NUMBER_OF_CARDS)], dtype=np.int64)
+
+        # One bit per card, so that hole pairs sharing cards can be found with a bitwise and
+        self.hole_pair_card_masks = np.left_shift(np.uint64(1), self.hole_pair_cards[:, 0].astype(np.uint64)) | \
+            np.left_shift(np.uint64(1), self.hole_pair_cards[:, 1].astype(np.uint64))
+
+        # (1326, 1326) True where two hole pairs share a card, including the diagonal
+        self.conflicts = (self.hole_pair_card_masks[:, None]
+                          & self.hole_pair_card_masks[None, :]) != 0
+
+    def hole_pair_to_index(self, hole_pair) -> int:
+        # hole_pair is a string like 'C2C3' (in any card order) or two cards
+        if isinstance(hole_pair, str):
+            hole_pair = [Card.from_string(hole_pair[:2]), Card.from_string(hole_pair[2:])]
+        return int(self.card_pair_to_index[hole_pair[0].index, hole_pair[1].index])
+
+    def index_to_hole_pair(self, index: int) -> str:
+        return self.hole_pair_strings[index]
+
+    def get_possible_hole_pairs(self, board_cards: Sequence[int]) -> np.ndarray:
+        # (1326,) True for the hole pairs that do not share a card with the board, given as card indices
+        board_mask = np.uint64(sum(1 << card for card in board_cards))
+        return (self.hole_pair_card_masks & board_mask) == 0
+
+    def get_compatible_range_sums(self, ranges: np.ndarray) -> np.ndarray:
+        # For ranges of shape (..., 1326), the total probability of the hole pairs that do not share a card with each hole pair.
+        # A hole pair shares a card with itself and with the hole pairs containing either of its cards
+        card_sums = ranges[..., self.hole_pairs_with_card].sum(axis=-1)
+        return ranges.sum(axis=-1, keepdims=True) - card_sums[..., self.hole_pair_cards[:, 0]] \
+            - card_sums[..., self.hole_pair_cards[:, 1]] + ranges
+
+
+@lru_cache(maxsize=None)
+def get_hole_pair_index() -> HolePairIndex:
+    return HolePairIndex()
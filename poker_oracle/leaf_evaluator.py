@@ -0,0 +1,50 @@
+from typing import List
+from game_manager.deck_manager import Card
+from poker_oracle.utility_matrix import UtilityMatrixHandler
+
+import numpy as np
+
+# Random completions of the board averaged by the rollout leaf evaluator
+N_LEAF_BOARDS = 32
+
+
+class UtilityMatrixLeafEvaluator:
+    """
+    Utility of each hole pair against a range at the end of a street, from a (1326, 1326) float32 matrix: the exact
+    utility matrix on the river, or utilities averaged over random completions of the board before it
+    """
+
+    def __init__(self, utility_matrix: np.ndarray) -> None:
+        self.utility_matrix = utility_matrix
+
+    @classmethod
+    def from_public_cards(cls, public_cards: List[Card], n_boards=N_LEAF_BOARDS, rng=None) -> 'UtilityMatrixLeafEvaluator':
+        utility_matrix_handler = UtilityMatrixHandler()
+        if len(public_cards) == 5:
+            utility_matrix_handler.generate_utility_matrix(public_cards)
+            return cls(utility_matrix_handler.utility_matrix.to_dense().astype(np.float32))
+        return cls(utility_matrix_handler.generate_expected_utility_matrix(public_cards, n_boards, rng))
+
+    def get_expected_utilities(self, pots: np.ndarray, ranges: np.ndarray) -> np.ndarray:
+        # ranges (n_leaves, 2, 1326) of both players at each leaf. Returns (n_leaves, 2, 1326): the utility of each
+        # hole pair of each player against the range of the other, between -1 and 1 per unit of opponent range
+        # One float32 matrix product for all leaves, since a float64 product would convert the matrix on every call
+        opponent_ranges = ranges[:, ::-1].astype(np.float32).reshape(-1, ranges.shape[-1])
+        return (opponent_ranges @ self.utility_matrix.T).reshape(ranges.shape)
+
+
+class ValueNetworkLeafEvaluator:
+    """
+    The same values as UtilityMatrixLeafEvaluator, estimated by a CounterfactualValueNetwork for all leaves in one batch
+    """
+
+    def __init__(self, value_network, public_cards: List[Card]) -> None:
+        self.value_network = value_network
+        self.board_cards = [card.index for card in public_cards]
+
+    def get_expected_utilities(self, pots: np.ndarray, ranges: np.ndarray) -> np.ndarray:
+        # The network takes normalized ranges, and the utilities grow linearly with the size of the opponent range
+        range_sizes = ranges.sum(axis=-1, keepdims=True)
+        normalized_ranges = np.divide(ranges, range_sizes, out=np.zeros_like(ranges), where=range_sizes > 0)
+        expected_utilities = self.value_network.predict(pots, self.board_cards, normalized_ranges)
+        return expected_utilities * range_sizes[:, ::-1]
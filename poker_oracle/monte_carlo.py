@@ -1,7 +1,19 @@
-from game_manager.deck_manager import Card, DeckManager
+from game_manager.deck_manager import Card
+from poker_oracle.rollout_sampler import RolloutSampler, count_won_pots, count_won_pots_against_ranges
+from poker_oracle.exact_enumerator import ExactEnumerator
+from poker_oracle.hole_pairs import get_hole_pair_index
 
 # from poker_oracle.hands_evaluator.utils import suits, ranks, card_values
+from typing import NamedTuple
+import argparse
 import csv
+import math
+import multiprocessing
+import os
+import random
+import time
+
+import numpy as np
 
 card_values = {'A': 14, 'K': 13, 'Q': 12, 'J': 11, 'T': 10,
                '9': 9, '8': 8, '7': 7, '6': 6, '5': 5, '4': 4, '3': 3, '2': 2, 'AL': 1}
@@ -9,8 +21,48 @@ suits = ['C', 'D', 'H', 'S']
 ranks = ['A', 'K', 'Q', 'J', 'T', '9', '8', '7', '6', '5', '4', '3', '2']
 
 
+# Rollouts are split in tasks of this size, each with its own seed, so that a seeded MonteCarlo
+# gives the same result for any number of workers
+ROLLOUTS_PER_TASK = 2500
+
+# Exact enumeration scores its hands with the batch evaluator, which is several times faster per hand than rollouts.
+# It is used when it needs at most this many times the hand evaluations of sampling
+EXACT_ENUMERATION_SPEEDUP = 5
+
+# Sequential sampling checks whether it can stop after every batch of this many rollouts
+ROLLOUTS_PER_CHECK = 250
+# z-score of a 95% confidence interval
+CONFIDENCE_Z_SCORE = 1.96
+# About the precision of 10,000 rollouts at a win probability of 0.5
+TARGET_CONFIDENCE_HALF_WIDTH = 0.01
+
+
+class WinProbabilityEstimate(NamedTuple):
+    win_probability: float
+    # Half width of the 95% confidence interval around win_probability, 0 when it is exact
+    confidence_half_width: float
+    n_rollouts: int
+    exact: bool
+
+
+def get_confidence_half_width(won_pots: float, squared_won_pots: float, n_rollouts: int) -> float:
+    # Agresti-Coull: z^2 / 2 pseudo-rollouts that win and z^2 / 2 that lose are added before the variance is computed.
+    # Without them, a batch where every rollout wins or every rollout loses has a half width of 0
+    pseudo_counts = CONFIDENCE_Z_SCORE ** 2 / 2
+    n_adjusted_rollouts = n_rollouts + 2 * pseudo_counts
+    win_probability = (won_pots + pseudo_counts) / n_adjusted_rollouts
+    variance = max((squared_won_pots + pseudo_counts) / n_adjusted_rollouts - win_probability ** 2, 0.0)
+    return CONFIDENCE_Z_SCORE * math.sqrt(variance / n_adjusted_rollouts)
+
+
 class MonteCarlo:
 
+    def __init__(self, workers=1, seed=None):
+        # workers > 1 runs the rollouts in a process pool. All task seeds are derived from the one master seed,
+        # an int or a np.random.SeedSequence spawned by the caller
+        self.workers = workers
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
     def generate_all_cards(self):
         all_cards = []
         for suit in suits:
@@ -27,21 +79,12 @@ class MonteCarlo:
 
     def get_all_possible_hole_pairs(self):
         # List of hole pairs represented ['C2C3', 'C2C4'] to create the probabilites
-        all_possible_cards = self.get_all_possible_cards()
-        all_possible_hole_pair = []
-        for i in range(len(all_possible_cards)):
-            for j in range(i+1, len(all_possible_cards)):
-                all_possible_hole_pair.append(
-                    all_possible_cards[i] + all_possible_cards[j])
-        return all_possible_hole_pair
+        return list(get_hole_pair_index().hole_pair_strings)
 
     def hole_pair_string_to_object(self, hole_pair_string):
 
-        card_string_1 = hole_pair_string[:2]
-        card_string_2 = hole_pair_string[2:]
-
-        card_1 = Card(card_string_1[0], card_string_1[1])
-        card_2 = Card(card_string_2[0], card_string_2[1])
+        card_1 = Card.from_string(hole_pair_string[:2])
+        card_2 = Card.from_string(hole_pair_string[2:])
         return [card_1, card_2]
 
     def write_probability_dictionary_to_file(self, win_probabilites, filename='hole_pair_win_probability'):
@@ -52,15 +95,27 @@ class MonteCarlo:
                 value_1, value_2, card_class = key
                 writer.writerow([value_1, value_2, card_class, probability])
 
-    def evaluate_all_hole_pair_win_probabilities(self, all_hole_pairs, n_opponents=1, community_cards=[]):
+    def evaluate_all_hole_pair_win_probabilities(self, all_hole_pairs, n_opponents=1, community_cards=[], n_rollouts=10000):
         # Returns dict = {'H3H4': 0.4}
         win_probabilities = {}
+        tasks_per_hole_pair = {}
         for hole_pair in all_hole_pairs:
-            win_probability = self.evaluate_hole_pair_win_probability(
-                hole_pair, n_opponents, community_cards)
-            # print(hole_pair, win_probability)
-            win_probabilities[hole_pair] = win_probability
-        return win_probabilities
+            exact_enumerator = self.get_exact_enumerator(
+                hole_pair, n_opponents, community_cards, n_rollouts)
+            if exact_enumerator is not None:
+                win_probabilities[hole_pair] = exact_enumerator.evaluate_win_probability()
+            else:
+                tasks_per_hole_pair[hole_pair] = self.create_rollout_tasks(
+                    hole_pair, n_opponents, community_cards, n_rollouts)
+
+        # The rollouts of all the hole pairs are run as one batch of tasks, so that the workers are kept busy
+        won_pots = iter(self.run_rollout_tasks(
+            [task for tasks in tasks_per_hole_pair.values() for task in tasks]))
+        for hole_pair, tasks in tasks_per_hole_pair.items():
+            win_probabilities[hole_pair] = sum(
+                next(won_pots) for _ in tasks) / n_rollouts
+
+        return {hole_pair: win_probabilities[hole_pair] for hole_pair in all_hole_pairs}
 
     def hole_pair_to_class(self, hole_pair):
         suit_1, value_1, suit_2, value_2 = hole_pair
@@ -77,7 +132,6 @@ class MonteCarlo:
 
     def get_all_hole_pair_classes(self):
         all_hole_pairs = self.get_all_possible_hole_pairs()
-        print(len(all_hole_pairs))
         found_hole_pair_classes = {}
         hole_pair_representatives = []
         for hole_pair in all_hole_pairs:
@@ -87,12 +141,12 @@ class MonteCarlo:
                 hole_pair_representatives.append(hole_pair)
         return hole_pair_representatives
 
-    def evaluate_all_hole_pair_win_probabilities_classes(self):
+    def evaluate_all_hole_pair_win_probabilities_classes(self, n_rollouts=10000):
         # Poker Cheat-Sheet Generator
         all_class_representative_hole_pairs = self.get_all_hole_pair_classes()
         print(all_class_representative_hole_pairs)
         win_probabilites_for_hole_pair_representing_classes = self.evaluate_all_hole_pair_win_probabilities(
-            all_class_representative_hole_pairs)
+            all_class_representative_hole_pairs, n_rollouts=n_rollouts)
         win_probabilites_for_classes = {}
         for hole_pair_representing_class, probability in win_probabilites_for_hole_pair_representing_classes.items():
             hole_pair_class = self.hole_pair_to_class(
@@ -104,75 +158,120 @@ class MonteCarlo:
         return self.evaluate_hole_pair_win_probability(
             player_1.hand, n_opponents, community_cards)
 
-    def deal_opponents_cards(self, deck_manager, opponents):
-        for player in opponents:
-            cards = deck_manager.get_n_cards(2)
-            player.receive_cards(cards)
-
-    def opponents_hand_over_cards(self, deck_manager, opponents):
-        for player in opponents:
-            hand = player.hand_over_cards()
-            deck_manager.receive_cards(hand)
-
-    def evaluate_hole_pair_win_probability(self, hole_pair, n_opponents, community_cards, n_rollouts=10000):
-        from game_manager.player import Player
-        from poker_oracle.hands_evaluator.hands_evaluator import HandsEvaluator
+    def hole_pair_to_card_indices(self, hole_pair):
         if isinstance(hole_pair, str):
             hole_pair = self.hole_pair_string_to_object(hole_pair)
-
-        # Initialize deck of cards without hole_pair and community_cards
-        deck_manager = DeckManager(True, hole_pair + community_cards)
-
-        deck_manager.shuffle_cards()
-
-        player_1 = Player()
-        opponents = [Player() for _ in range(n_opponents)]
-
-        # Deal cards
-        player_1.receive_cards(hole_pair)
-
-        num_player_1_wins = 0
-        num_public_cards_to_deal = 5 - len(community_cards)
-        for _ in range(n_rollouts):
-            deck_manager.shuffle_cards()
-            # Deal opponents cards
-            self.deal_opponents_cards(deck_manager, opponents)
-
-            # Deal public cards
-            public_cards = deck_manager.get_n_cards(
-                num_public_cards_to_deal)
-
-            # Find the winner from the rollout
-            hands_evaluator = HandsEvaluator()
-            winner = hands_evaluator.get_winner(
-                [player_1] + opponents, public_cards + community_cards)
-
-            if player_1 in winner:
-                num_player_1_wins += 1/(len(winner))
-
-            self.opponents_hand_over_cards(deck_manager, opponents)
-            deck_manager.receive_cards(public_cards)
-        return num_player_1_wins / n_rollouts
+        return [card.index for card in hole_pair]
+
+    def get_exact_enumerator(self, hole_pair, n_opponents, community_cards, n_rollouts, exact=None, opponent_range=None):
+        # exact=None picks exact enumeration when it is cheaper than sampling. Only heads-up is enumerated
+        if exact is False:
+            return None
+        if n_opponents != 1:
+            if exact:
+                raise ValueError(
+                    'Exact enumeration is only supported with one opponent')
+            return None
+
+        exact_enumerator = ExactEnumerator(self.hole_pair_to_card_indices(hole_pair), [
+                                           card.index for card in community_cards], opponent_range)
+        n_sampling_evaluations = n_rollouts * (n_opponents + 1)
+        if exact or exact_enumerator.count_evaluations() <= EXACT_ENUMERATION_SPEEDUP * n_sampling_evaluations:
+            return exact_enumerator
+        return None
+
+    def create_rollout_tasks(self, hole_pair, n_opponents, community_cards, n_rollouts, opponent_ranges=None):
+        # With opponent_ranges, the tasks are for count_won_pots_against_ranges and hold the ranges instead of n_opponents
+        hole_cards = self.hole_pair_to_card_indices(hole_pair)
+        community_card_indices = [card.index for card in community_cards]
+
+        n_tasks = -(-n_rollouts // ROLLOUTS_PER_TASK)
+        tasks = []
+        for i, seed_sequence in enumerate(self.seed_sequence.spawn(n_tasks)):
+            n_task_rollouts = min(ROLLOUTS_PER_TASK, n_rollouts - i * ROLLOUTS_PER_TASK)
+            seed = int(seed_sequence.generate_state(1)[0])
+            tasks.append((hole_cards, community_card_indices,
+                         n_opponents if opponent_ranges is None else opponent_ranges, n_task_rollouts, seed))
+        return tasks
+
+    def run_rollout_tasks(self, tasks, count_won_pots=count_won_pots):
+        # Returns the number of won pots for each task
+        if self.workers > 1 and len(tasks) > 1:
+            with multiprocessing.Pool(min(self.workers, len(tasks))) as pool:
+                return pool.map(count_won_pots, tasks)
+        return [count_won_pots(task) for task in tasks]
+
+    def evaluate_hole_pair_win_probability(self, hole_pair, n_opponents, community_cards, n_rollouts=10000, exact=None):
+        exact_enumerator = self.get_exact_enumerator(
+            hole_pair, n_opponents, community_cards, n_rollouts, exact)
+        if exact_enumerator is not None:
+            return exact_enumerator.evaluate_win_probability()
+
+        tasks = self.create_rollout_tasks(
+            hole_pair, n_opponents, community_cards, n_rollouts)
+        return sum(self.run_rollout_tasks(tasks)) / n_rollouts
+
+    def evaluate_hole_pair_win_probability_against_ranges(self, hole_pair, opponent_ranges, community_cards, n_rollouts=10000, exact=None):
+        # opponent_ranges has one weighted range over the 1326 hole pairs, in the order of get_all_possible_hole_pairs,
+        # per opponent. Heads-up, the range is enumerated when that is cheaper than sampling
+        opponent_ranges = [np.asarray(opponent_range, dtype=np.float64) for opponent_range in opponent_ranges]
+        exact_enumerator = self.get_exact_enumerator(
+            hole_pair, len(opponent_ranges), community_cards, n_rollouts, exact, opponent_ranges[0])
+        if exact_enumerator is not None:
+            return exact_enumerator.evaluate_win_probability()
+
+        tasks = self.create_rollout_tasks(
+            hole_pair, len(opponent_ranges), community_cards, n_rollouts, opponent_ranges)
+        return sum(self.run_rollout_tasks(tasks, count_won_pots_against_ranges)) / n_rollouts
+
+    def estimate_hole_pair_win_probability(self, hole_pair, n_opponents, community_cards, max_rollouts=10000,
+                                           target_confidence_half_width=TARGET_CONFIDENCE_HALF_WIDTH, time_budget=None, stop_condition=None):
+        # Samples until the confidence interval is narrow enough, stop_condition(estimate) returns True,
+        # max_rollouts is reached or time_budget seconds have passed
+        start_time = time.perf_counter()
+        exact_enumerator = self.get_exact_enumerator(
+            hole_pair, n_opponents, community_cards, max_rollouts)
+        if exact_enumerator is not None:
+            return WinProbabilityEstimate(exact_enumerator.evaluate_win_probability(), 0.0, 0, True)
+
+        seed = int(self.seed_sequence.spawn(1)[0].generate_state(1)[0])
+        rollout_sampler = RolloutSampler(self.hole_pair_to_card_indices(hole_pair), [
+                                         card.index for card in community_cards], n_opponents, random.Random(seed))
+
+        won_pots = 0.0
+        squared_won_pots = 0.0
+        n_rollouts = 0
+        estimate = WinProbabilityEstimate(0.0, 1.0, 0, False)
+        while n_rollouts < max_rollouts:
+            n_batch_rollouts = min(ROLLOUTS_PER_CHECK, max_rollouts - n_rollouts)
+            for _ in range(n_batch_rollouts):
+                won_pot = rollout_sampler.rollout()
+                won_pots += won_pot
+                squared_won_pots += won_pot * won_pot
+            n_rollouts += n_batch_rollouts
+
+            estimate = WinProbabilityEstimate(won_pots / n_rollouts, get_confidence_half_width(
+                won_pots, squared_won_pots, n_rollouts), n_rollouts, False)
+
+            if estimate.confidence_half_width <= target_confidence_half_width:
+                break
+            if stop_condition is not None and stop_condition(estimate):
+                break
+            if time_budget is not None and time.perf_counter() - start_time >= time_budget:
+                break
+        return estimate
 
 
 if __name__ == '__main__':
-    montecarlo = MonteCarlo()
-    # win_probabilites_for_classes = montecarlo.evaluate_all_hole_pair_win_probabilities_classes()
-    # montecarlo.write_probability_dictionary_to_file(
-    #     win_probabilites_for_classes)
-    
-    card = Card('C', '5')
-
-    placard_1 = card[:2]
-
-
-    string_card = str(card)
-
-
-    print(string_card)
-    # player = Player()
-    # player.hand = [Card('H', '9'), Card('H', 'K')]
-    # community_cards = [Card('H', 'Q'), Card('H', 'T'), Card('H', 'J')]
-    # probability = montecarlo.evaluate_player_win_probability_after_pre_flop(
-    #     player, community_cards, 1)
-    # print(probability)
+    parser = argparse.ArgumentParser(
+        description='Poker cheat-sheet generator: win probability of every preflop hole pair class')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--rollouts', type=int, default=10000)
+    args = parser.parse_args()
+
+    montecarlo = MonteCarlo(workers=args.workers, seed=args.seed)
+    win_probabilites_for_classes = montecarlo.evaluate_all_hole_pair_win_probabilities_classes(
+        args.rollouts)
+    montecarlo.write_probability_dictionary_to_file(
+        win_probabilites_for_classes)
@@ -0,0 +1,80 @@
+from poker_oracle.monte_carlo import MonteCarlo
+from functools import lru_cache
+
+import argparse
+import os
+import numpy as np
+
+MAX_OPPONENTS = 9
+
+# Generated once with `make preflop_table`
+PREFLOP_EQUITY_TABLE_PATH = os.path.join(
+    os.path.dirname(__file__), 'preflop_equity_table.npy')
+
+
+class PreflopEquityTable:
+    """
+    Preflop win probability for each of the 169 hole pair classes against 1 to 9 opponents.
+    Stored as a (169, 9) float32 array, rows in the order of MonteCarlo.get_all_hole_pair_classes
+    """
+
+    def __init__(self, win_probabilities: np.ndarray) -> None:
+        self.monte_carlo = MonteCarlo()
+        class_representatives = self.monte_carlo.get_all_hole_pair_classes()
+        self.class_to_row = {self.monte_carlo.hole_pair_to_class(hole_pair): row
+                             for row, hole_pair in enumerate(class_representatives)}
+        assert win_probabilities.shape == (
+            len(self.class_to_row), MAX_OPPONENTS)
+        self.win_probabilities = win_probabilities
+
+    @classmethod
+    def generate(cls, n_rollouts=10000, workers=1, seed=None) -> 'PreflopEquityTable':
+        monte_carlo = MonteCarlo(workers=workers, seed=seed)
+        class_representatives = monte_carlo.get_all_hole_pair_classes()
+        win_probabilities = np.zeros(
+            (len(class_representatives), MAX_OPPONENTS), dtype=np.float32)
+        for n_opponents in range(1, MAX_OPPONENTS + 1):
+            win_probabilities_for_opponents = monte_carlo.evaluate_all_hole_pair_win_probabilities(
+                class_representatives, n_opponents, n_rollouts=n_rollouts)
+            win_probabilities[:, n_opponents - 1] = [
+                win_probabilities_for_opponents[hole_pair] for hole_pair in class_representatives]
+        return cls(win_probabilities)
+
+    @classmethod
+    def load(cls, path=PREFLOP_EQUITY_TABLE_PATH):
+        # Returns None if the table has not been generated
+        if not os.path.exists(path):
+            return None
+        return cls(np.load(path))
+
+    def save(self, path=PREFLOP_EQUITY_TABLE_PATH):
+        np.save(path, self.win_probabilities)
+
+    def lookup(self, hole_pair, n_opponents):
+        # hole_pair is a string like 'SAHK' or a list of two cards. Returns None for an unsupported number of opponents
+        if not 1 <= n_opponents <= MAX_OPPONENTS:
+            return None
+        if not isinstance(hole_pair, str):
+            hole_pair = ''.join(str(card) for card in hole_pair)
+        row = self.class_to_row[self.monte_carlo.hole_pair_to_class(hole_pair)]
+        return float(self.win_probabilities[row, n_opponents - 1])
+
+
+@lru_cache(maxsize=None)
+def get_preflop_equity_table():
+    # None if it has not been generated
+    return PreflopEquityTable.load()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Generates the preflop win probability table used by PureRolloutResolver')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--rollouts', type=int, default=10000)
+    args = parser.parse_args()
+
+    preflop_equity_table = PreflopEquityTable.generate(
+        args.rollouts, args.workers, args.seed)
+    preflop_equity_table.save()
+    print(f'Wrote {PREFLOP_EQUITY_TABLE_PATH}')
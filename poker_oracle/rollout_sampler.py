@@ -0,0 +1,190 @@
+from typing import List, Sequence
+from game_manager.deck_manager import NUMBER_OF_CARDS
+from poker_oracle.hands_evaluator.rank_evaluator import evaluate_card_indices
+from poker_oracle.hole_pairs import get_hole_pair_index
+
+import random
+import numpy as np
+
+NUMBER_OF_COMMUNITY_CARDS = 5
+# Deals of opponent hole pairs that share cards are redrawn, at most this many times per rollout
+MAX_DEAL_ATTEMPTS = 1000
+
+
+class RolloutSampler:
+    """
+    Rollout engine for MonteCarlo. Works on card indices only: the remaining deck is a preallocated list,
+    and each rollout only shuffles the cards it deals with a partial Fisher-Yates shuffle.
+    No Player, Card or list objects are created per rollout.
+    """
+
+    def __init__(self, hole_cards: List[int], community_cards: List[int], n_opponents: int, rng: random.Random = random) -> None:
+        self.rng = rng
+        known_cards = set(hole_cards) | set(community_cards)
+        self.deck = [card for card in range(
+            NUMBER_OF_CARDS) if card not in known_cards]
+
+        self.n_opponents = n_opponents
+        self.n_public_cards_to_deal = NUMBER_OF_COMMUNITY_CARDS - \
+            len(community_cards)
+        self.n_cards_to_deal = self.n_public_cards_to_deal + 2 * n_opponents
+        assert self.n_cards_to_deal <= len(self.deck)
+
+        # Hands are laid out as [hole card, hole card, community cards..., public cards dealt in the rollout...]
+        public_cards_placeholder = [0] * self.n_public_cards_to_deal
+        self.player_hand = list(hole_cards) + \
+            list(community_cards) + public_cards_placeholder
+        self.opponent_hand = [0, 0] + \
+            list(community_cards) + public_cards_placeholder
+        # Where deal puts the public cards and the opponent hole cards in the deck
+        self.public_cards_offset = 0
+        self.opponent_cards_offset = self.n_public_cards_to_deal
+
+    def deal(self):
+        # Moves the cards of one rollout to the front of the deck. Public cards first, then two cards per opponent
+        deck = self.deck
+        n_cards_in_deck = len(deck)
+        random_number = self.rng.random
+        for i in range(self.n_cards_to_deal):
+            j = i + int(random_number() * (n_cards_in_deck - i))
+            deck[i], deck[j] = deck[j], deck[i]
+
+    def rollout(self) -> float:
+        # Returns the share of the pot player 1 wins in one rollout: 1 for a win, 1/n for an n-way tie
+        self.deal()
+        deck = self.deck
+        player_hand = self.player_hand
+        opponent_hand = self.opponent_hand
+
+        first_public_card_slot = len(player_hand) - self.n_public_cards_to_deal
+        public_cards_offset = self.public_cards_offset
+        for i in range(self.n_public_cards_to_deal):
+            player_hand[first_public_card_slot + i] = deck[public_cards_offset + i]
+            opponent_hand[first_public_card_slot + i] = deck[public_cards_offset + i]
+
+        player_strength = evaluate_card_indices(player_hand)
+        n_tied_opponents = 0
+        opponent_cards_offset = self.opponent_cards_offset
+        for opponent in range(self.n_opponents):
+            opponent_hand[0] = deck[opponent_cards_offset + 2 * opponent]
+            opponent_hand[1] = deck[opponent_cards_offset + 2 * opponent + 1]
+            opponent_strength = evaluate_card_indices(opponent_hand)
+            if opponent_strength > player_strength:
+                return 0.0
+            if opponent_strength == player_strength:
+                n_tied_opponents += 1
+        return 1 / (n_tied_opponents + 1)
+
+    def count_won_pots(self, n_rollouts: int) -> float:
+        won_pots = 0.0
+        for _ in range(n_rollouts):
+            won_pots += self.rollout()
+        return won_pots
+
+    def estimate_win_probability(self, n_rollouts: int) -> float:
+        return self.count_won_pots(n_rollouts) / n_rollouts
+
+
+class AliasTable:
+    """
+    Walker's alias method: after O(n) setup, samples one of n weighted outcomes with one random number
+    """
+
+    def __init__(self, weights: Sequence[float]) -> None:
+        n = len(weights)
+        total = sum(weights)
+        if total <= 0:
+            raise ValueError('The weights must have a positive sum')
+        scaled_weights = [weight * n / total for weight in weights]
+        self.n = n
+        self.probabilities = [1.0] * n
+        # Slots left over by rounding errors keep their own outcome, unless it has no weight
+        most_likely = max(range(n), key=lambda i: weights[i])
+        self.aliases = [i if weight > 0 else most_likely for i, weight in enumerate(weights)]
+        for i, weight in enumerate(weights):
+            if weight <= 0:
+                self.probabilities[i] = 0.0
+
+        small = [i for i, weight in enumerate(scaled_weights) if weight < 1]
+        large = [i for i, weight in enumerate(scaled_weights) if weight >= 1]
+        while small and large:
+            i = small.pop()
+            j = large.pop()
+            # Outcome i keeps its own weight of the slot, and outcome j fills the rest
+            self.probabilities[i] = scaled_weights[i]
+            self.aliases[i] = j
+            scaled_weights[j] += scaled_weights[i] - 1
+            (small if scaled_weights[j] < 1 else large).append(j)
+
+    def sample(self, random_number: float) -> int:
+        # random_number is uniform in [0, 1). Its integer part picks the slot, and the rest the outcome in it
+        position = random_number * self.n
+        slot = int(position)
+        return slot if position - slot < self.probabilities[slot] else self.aliases[slot]
+
+
+class RangeRolloutSampler(RolloutSampler):
+    """
+    Rollouts against opponents holding hole pairs drawn from weighted ranges over the 1326 hole pairs, instead of
+    random cards. Hole pairs that share a card with the known cards are removed from the ranges, and deals where
+    two opponents share a card are rejected and drawn again
+    """
+
+    def __init__(self, hole_cards: List[int], community_cards: List[int], opponent_ranges: Sequence[np.ndarray],
+                 rng: random.Random = random) -> None:
+        super().__init__(hole_cards, community_cards, len(opponent_ranges), rng)
+        hole_pair_index = get_hole_pair_index()
+        is_possible = hole_pair_index.get_possible_hole_pairs(
+            list(hole_cards) + list(community_cards))
+        self.alias_tables = [AliasTable((np.asarray(opponent_range) * is_possible).tolist())
+                             for opponent_range in opponent_ranges]
+        self.hole_pair_cards = hole_pair_index.hole_pair_cards.tolist()
+        self.deck_positions = [0] * NUMBER_OF_CARDS
+        for position, card in enumerate(self.deck):
+            self.deck_positions[card] = position
+
+        self.opponent_cards_offset = 0
+        self.public_cards_offset = 2 * self.n_opponents
+
+    def deal_opponent_cards(self) -> List[int]:
+        random_number = self.rng.random
+        hole_pair_cards = self.hole_pair_cards
+        for _ in range(MAX_DEAL_ATTEMPTS):
+            opponent_cards = []
+            for alias_table in self.alias_tables:
+                opponent_cards += hole_pair_cards[alias_table.sample(random_number())]
+            if len(set(opponent_cards)) == len(opponent_cards):
+                return opponent_cards
+        raise ValueError('The opponent ranges have no hole pairs without shared cards')
+
+    def deal(self):
+        # Moves the opponent hole cards to the front of the deck, and shuffles the public cards in after them
+        deck = self.deck
+        deck_positions = self.deck_positions
+        for i, card in enumerate(self.deal_opponent_cards()):
+            j = deck_positions[card]
+            deck[i], deck[j] = deck[j], deck[i]
+            deck_positions[deck[i]], deck_positions[deck[j]] = i, j
+
+        n_cards_in_deck = len(deck)
+        random_number = self.rng.random
+        for i in range(self.public_cards_offset, self.public_cards_offset + self.n_public_cards_to_deal):
+            j = i + int(random_number() * (n_cards_in_deck - i))
+            deck[i], deck[j] = deck[j], deck[i]
+            deck_positions[deck[i]], deck_positions[deck[j]] = i, j
+
+
+def count_won_pots(task) -> float:
+    # Entry point for MonteCarlo worker processes. A task is (hole cards, community cards, n_opponents, n_rollouts, seed)
+    hole_cards, community_cards, n_opponents, n_rollouts, seed = task
+    rollout_sampler = RolloutSampler(
+        hole_cards, community_cards, n_opponents, random.Random(seed))
+    return rollout_sampler.count_won_pots(n_rollouts)
+
+
+def count_won_pots_against_ranges(task) -> float:
+    # Entry point for MonteCarlo worker processes. A task is (hole cards, community cards, opponent ranges, n_rollouts, seed)
+    hole_cards, community_cards, opponent_ranges, n_rollouts, seed = task
+    rollout_sampler = RangeRolloutSampler(
+        hole_cards, community_cards, opponent_ranges, random.Random(seed))
+    return rollout_sampler.count_won_pots(n_rollouts)
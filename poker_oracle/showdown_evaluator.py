@@ -0,0 +1,76 @@
+from typing import List
+from game_manager.deck_manager import Card
+from poker_oracle.hole_pairs import get_hole_pair_index
+from poker_oracle.utility_matrix import get_hole_pair_strengths
+
+import numpy as np
+
+# Larger than any hand strength
+CARD_ROW_OFFSET = 1 << 24
+
+
+class ShowdownEvaluator:
+    """
+    Utility of all 1326 hole pairs against an opponent range on a river board in O(n) per range, instead of a
+    product with the (1326, 1326) utility matrix. The hole pairs are sorted by strength once per board, and prefix
+    sums of the range give the probability of the weaker and stronger hole pairs. The same sums over the 51 hole pairs
+    with each card remove the opponent hole pairs that share a card with the hole pair being evaluated
+    """
+
+    def __init__(self, public_cards: List[Card]) -> None:
+        self.hole_pair_index = get_hole_pair_index()
+        # Without a UtilityMatrixHandler, which allocates a (1326, 1326) matrix
+        strengths = get_hole_pair_strengths(public_cards)
+        self.is_possible = strengths >= 0
+        # Blocked hole pairs sort first, and are kept out of the sums by zeroing their range
+        self.order = np.argsort(strengths, kind='stable')
+        sorted_strengths = strengths[self.order]
+        # Number of hole pairs in the sorted order that are weaker than, and not stronger than, each hole pair
+        self.n_weaker = np.searchsorted(sorted_strengths, strengths, side='left')
+        self.n_not_stronger = np.searchsorted(sorted_strengths, strengths, side='right')
+
+        # The same for the 51 hole pairs with each card. Offsetting the strengths of each card row by more than any strength
+        # makes the rows one sorted array, so all the searches are done at once. The counts index the flattened
+        # (52, 52) prefix sums of the card rows
+        hole_pairs_with_card = self.hole_pair_index.hole_pairs_with_card
+        card_strengths = strengths[hole_pairs_with_card]
+        card_order = np.argsort(card_strengths, axis=1, kind='stable')
+        self.sorted_hole_pairs_with_card = np.take_along_axis(hole_pairs_with_card, card_order, axis=1)
+        n_cards, n_hole_pairs_per_card = hole_pairs_with_card.shape
+        row_offsets = np.arange(n_cards)[:, None] * CARD_ROW_OFFSET
+        sorted_card_strengths = (np.take_along_axis(card_strengths, card_order, axis=1) + row_offsets).ravel()
+        # A search result c * 51 + i in the sorted array is entry c * 52 + i of the prefix sums, for each of the two cards
+        cards = self.hole_pair_index.hole_pair_cards.T
+        offset_strengths = strengths + cards * CARD_ROW_OFFSET
+        self.card_n_weaker = np.searchsorted(sorted_card_strengths, offset_strengths, side='left') + cards
+        self.card_n_not_stronger = np.searchsorted(sorted_card_strengths, offset_strengths, side='right') + cards
+        self.card_n_all = cards * (n_hole_pairs_per_card + 1) + n_hole_pairs_per_card
+
+    def evaluate_showdown(self, opponent_ranges: np.ndarray) -> np.ndarray:
+        # For ranges of shape (..., 1326), the probability of beating the opponent range minus the probability
+        # of losing to it, for every hole pair. Equal to the product with the utility matrix, and 0 for blocked hole pairs
+        opponent_ranges = opponent_ranges * self.is_possible
+        prefix_sums = self.get_prefix_sums(opponent_ranges[..., self.order])
+        weaker = prefix_sums[..., self.n_weaker]
+        stronger = prefix_sums[..., -1:] - prefix_sums[..., self.n_not_stronger]
+
+        card_ranges = opponent_ranges[..., self.sorted_hole_pairs_with_card]
+        card_prefix_sums = self.get_prefix_sums(card_ranges).reshape(card_ranges.shape[:-2] + (-1,))
+        # Summed over the two cards of each hole pair
+        weaker -= card_prefix_sums[..., self.card_n_weaker].sum(axis=-2)
+        stronger -= (card_prefix_sums[..., self.card_n_all] -
+                     card_prefix_sums[..., self.card_n_not_stronger]).sum(axis=-2)
+        return (weaker - stronger) * self.is_possible
+
+    def get_prefix_sums(self, ranges):
+        return np.concatenate([np.zeros(ranges.shape[:-1] + (1,)), np.cumsum(ranges, axis=-1)], axis=-1)
+
+    def evaluate_fold(self, opponent_ranges: np.ndarray) -> np.ndarray:
+        # For ranges of shape (..., 1326), the probability of the opponent range that does not share a card with each
+        # hole pair. Multiplied by the chips won or lost, this is the value of a fold node
+        opponent_ranges = opponent_ranges * self.is_possible
+        return self.hole_pair_index.get_compatible_range_sums(opponent_ranges) * self.is_possible
+
+    def get_expected_utilities(self, pots: np.ndarray, ranges: np.ndarray) -> np.ndarray:
+        # Leaf evaluator interface of CFRPlusSolver: ranges (n_leaves, 2, 1326) of both players
+        return self.evaluate_showdown(ranges[:, ::-1])
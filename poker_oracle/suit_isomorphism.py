@@ -0,0 +1,68 @@
+from typing import Dict, List, Sequence, Tuple
+from itertools import combinations
+from math import comb
+from game_manager.deck_manager import NUMBER_OF_CARDS, SUIT_BITS, SUIT_MASK
+
+NUMBER_OF_SUITS = 4
+
+
+def get_canonical_suits(hole_cards: Sequence[int], community_cards: Sequence[int]) -> List[int]:
+    # Canonical label of each suit. Suits are ordered by which ranks they have on hand and on the board.
+    # Suits with the same ranks are interchangeable, so it does not matter which of them gets which label
+    hole_rank_masks = [0] * NUMBER_OF_SUITS
+    community_rank_masks = [0] * NUMBER_OF_SUITS
+    for card in hole_cards:
+        hole_rank_masks[card & SUIT_MASK] |= 1 << (card >> SUIT_BITS)
+    for card in community_cards:
+        community_rank_masks[card & SUIT_MASK] |= 1 << (card >> SUIT_BITS)
+
+    suit_order = sorted(range(NUMBER_OF_SUITS), key=lambda suit: (
+        hole_rank_masks[suit], community_rank_masks[suit]), reverse=True)
+    canonical_suits = [0] * NUMBER_OF_SUITS
+    for canonical_suit, suit in enumerate(suit_order):
+        canonical_suits[suit] = canonical_suit
+    return canonical_suits
+
+
+def relabel_suits(cards: Sequence[int], canonical_suits: Sequence[int]) -> Tuple[int, ...]:
+    return tuple(sorted((card >> SUIT_BITS) << SUIT_BITS | canonical_suits[card & SUIT_MASK] for card in cards))
+
+
+def canonicalize(hole_cards: Sequence[int], community_cards: Sequence[int]) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    # Relabels the suits of card indices so that all suit-isomorphic (hole cards, board) situations give the same cards
+    canonical_suits = get_canonical_suits(hole_cards, community_cards)
+    return (relabel_suits(hole_cards, canonical_suits),
+            relabel_suits(community_cards, canonical_suits))
+
+
+def canonicalize_board(community_cards: Sequence[int]) -> Tuple[int, ...]:
+    return canonicalize([], community_cards)[1]
+
+
+def combination_index(cards: Sequence[int]) -> int:
+    # Colexicographic rank of a set of card indices: 0..C(52, len(cards)) - 1
+    return sum(comb(card, i + 1) for i, card in enumerate(sorted(cards)))
+
+
+def canonical_index(hole_cards: Sequence[int], community_cards: Sequence[int]) -> int:
+    # Index of the canonical representative. The same in every process and run, and equal for all isomorphic situations.
+    # Indices are unique per number of hole and community cards, but not dense
+    canonical_hole_cards, canonical_community_cards = canonicalize(
+        hole_cards, community_cards)
+    return combination_index(canonical_hole_cards) * comb(NUMBER_OF_CARDS, len(canonical_community_cards)) + \
+        combination_index(canonical_community_cards)
+
+
+def get_canonical_boards(n_cards: int) -> Dict[Tuple[int, ...], int]:
+    # All canonical boards with n_cards cards, mapped to how many boards they represent. Sorted by combination index
+    canonical_boards = {}
+    for board in combinations(range(NUMBER_OF_CARDS), n_cards):
+        canonical_board = canonicalize_board(board)
+        canonical_boards[canonical_board] = canonical_boards.get(
+            canonical_board, 0) + 1
+    return dict(sorted(canonical_boards.items(), key=lambda item: combination_index(item[0])))
+
+
+def get_canonical_hole_pairs() -> Dict[Tuple[int, ...], int]:
+    # The 169 preflop classes, mapped to how many hole pairs they represent. Sorted by combination index
+    return get_canonical_boards(2)
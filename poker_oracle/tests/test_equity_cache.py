@@ -0,0 +1,38 @@
+import unittest
+from poker_oracle.equity_cache import EquityCache
+from game_manager.deck_manager import Card
+
+
+class TestEquityCache(unittest.TestCase):
+    def setUp(self):
+        self.equity_cache = EquityCache(maxsize=2)
+
+    def test_suit_isomorphic_keys(self):
+        key = self.equity_cache.create_key(
+            [Card('S', 'A'), Card('H', 'A')], [Card('S', '2'), Card('S', '9'), Card('D', 'K')], 1)
+        # Same situation with hearts and spades swapped, and the cards in another order
+        isomorphic_key = self.equity_cache.create_key(
+            [Card('S', 'A'), Card('H', 'A')], [Card('D', 'K'), Card('H', '9'), Card('H', '2')], 1)
+        different_key = self.equity_cache.create_key(
+            [Card('S', 'A'), Card('H', 'A')], [Card('C', '2'), Card('C', '9'), Card('D', 'K')], 1)
+
+        self.assertEqual(key, isomorphic_key)
+        self.assertNotEqual(key, different_key)
+        self.assertNotEqual(key, self.equity_cache.create_key(
+            [Card('S', 'A'), Card('H', 'A')], [Card('S', '2'), Card('S', '9'), Card('D', 'K')], 2))
+
+    def test_lru_and_counters(self):
+        self.equity_cache.put('a', 0.1)
+        self.equity_cache.put('b', 0.2)
+        self.assertEqual(self.equity_cache.get('a'), 0.1)
+        # 'b' is now the least recently used entry
+        self.equity_cache.put('c', 0.3)
+        self.assertIsNone(self.equity_cache.get('b'))
+        self.assertIsNone(self.equity_cache.get('c', is_usable=lambda value: value < 0.3))
+
+        self.assertEqual(self.equity_cache.stats(), {
+                         'hits': 1, 'misses': 2, 'size': 2, 'maxsize': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+import os
+import random
+import tempfile
+import unittest
+import numpy as np
+from poker_oracle.monte_carlo import MonteCarlo, get_confidence_half_width, ROLLOUTS_PER_CHECK, TARGET_CONFIDENCE_HALF_WIDTH
+from poker_oracle.preflop_equity_table import PreflopEquityTable
+from poker_oracle.rollout_sampler import RolloutSampler, RangeRolloutSampler, AliasTable
+from poker_oracle.hole_pairs import get_hole_pair_index
+from game_manager.deck_manager import Card
+
+
+class TestMonteCarlo(unittest.TestCase):
+    def setUp(self):
+        self.monte_carlo = MonteCarlo()
+        self.royal_flush_board = [Card('S', 'A'), Card('S', 'K'), Card('S', 'Q'),
+                                  Card('S', 'J'), Card('S', 'T')]
+
+    def test_board_plays(self):
+        # Everyone splits the pot when the board is a royal flush
+        win_probability = self.monte_carlo.evaluate_hole_pair_win_probability(
+            'H2D3', 1, self.royal_flush_board, n_rollouts=200)
+        self.assertEqual(win_probability, 0.5)
+
+        win_probability = self.monte_carlo.evaluate_hole_pair_win_probability(
+            'H2D3', 3, self.royal_flush_board, n_rollouts=200)
+        self.assertEqual(win_probability, 0.25)
+
+    def test_nuts(self):
+        community_cards = self.royal_flush_board[1:]
+        win_probability = self.monte_carlo.evaluate_hole_pair_win_probability(
+            'SAD3', 2, community_cards, n_rollouts=200)
+        self.assertEqual(win_probability, 1.0)
+
+    def test_rollout_sampler_keeps_deck(self):
+        rollout_sampler = RolloutSampler([0, 1], [2, 3, 4], 3)
+        deck = list(rollout_sampler.deck)
+        for _ in range(100):
+            rollout_sampler.rollout()
+        self.assertEqual(sorted(rollout_sampler.deck), deck)
+
+    def test_pocket_aces(self):
+        win_probability = self.monte_carlo.evaluate_hole_pair_win_probability(
+            'SAHA', 1, [], n_rollouts=5000)
+        self.assertAlmostEqual(win_probability, 0.85, delta=0.03)
+
+    def test_seeded_workers(self):
+        # The same master seed gives the same estimates, however the rollouts are split over the workers
+        hole_pairs = ['SAHA', 'C5C6']
+        serial = MonteCarlo(workers=1, seed=3).evaluate_all_hole_pair_win_probabilities(
+            hole_pairs, n_rollouts=3000)
+        parallel = MonteCarlo(workers=2, seed=3).evaluate_all_hole_pair_win_probabilities(
+            hole_pairs, n_rollouts=3000)
+        self.assertEqual(serial, parallel)
+
+    def test_exact_enumeration(self):
+        community_cards = [Card('S', 'Q'), Card('H', 'J'), Card('S', 'T'), Card('D', '3')]
+        # On the turn heads-up the exact mode is picked automatically, so the estimate has no variance
+        first_estimate = self.monte_carlo.evaluate_hole_pair_win_probability(
+            'SAHK', 1, community_cards)
+        second_estimate = self.monte_carlo.evaluate_hole_pair_win_probability(
+            'SAHK', 1, community_cards)
+        self.assertEqual(first_estimate, second_estimate)
+
+        sampled_estimate = self.monte_carlo.evaluate_hole_pair_win_probability(
+            'SAHK', 1, community_cards, n_rollouts=5000, exact=False)
+        self.assertAlmostEqual(first_estimate, sampled_estimate, delta=0.02)
+
+        # Splitting the pot on a royal flush board
+        win_probability = self.monte_carlo.evaluate_hole_pair_win_probability(
+            'H2D3', 1, self.royal_flush_board, exact=True)
+        self.assertEqual(win_probability, 0.5)
+
+        with self.assertRaises(ValueError):
+            self.monte_carlo.evaluate_hole_pair_win_probability(
+                'H2D3', 2, community_cards, exact=True)
+
+    def test_sequential_sampling(self):
+        estimate = self.monte_carlo.estimate_hole_pair_win_probability(
+            'SAHA', 1, [], max_rollouts=20000, target_confidence_half_width=0.02)
+        self.assertLessEqual(estimate.confidence_half_width, 0.02)
+        self.assertLess(estimate.n_rollouts, 20000)
+        self.assertAlmostEqual(estimate.win_probability, 0.85, delta=0.04)
+
+        estimate = self.monte_carlo.estimate_hole_pair_win_probability(
+            'SAHA', 1, [], target_confidence_half_width=0.0, stop_condition=lambda estimate: estimate.n_rollouts >= 500)
+        self.assertEqual(estimate.n_rollouts, 500)
+
+        estimate = self.monte_carlo.estimate_hole_pair_win_probability(
+            'SAHK', 1, self.royal_flush_board[2:] + [Card('D', '2')])
+        self.assertTrue(estimate.exact)
+        self.assertEqual(estimate.confidence_half_width, 0.0)
+
+    def test_degenerate_batch(self):
+        # A royal flush on the flop wins every rollout, which must not look like a precise estimate after one batch
+        self.assertGreater(get_confidence_half_width(250, 250, 250), TARGET_CONFIDENCE_HALF_WIDTH)
+        self.assertGreater(get_confidence_half_width(0, 0, 250), TARGET_CONFIDENCE_HALF_WIDTH)
+        estimate = self.monte_carlo.estimate_hole_pair_win_probability(
+            'SJST', 1, self.royal_flush_board[:3], max_rollouts=2000)
+        self.assertEqual(estimate.win_probability, 1.0)
+        self.assertGreater(estimate.n_rollouts, ROLLOUTS_PER_CHECK)
+        self.assertGreater(estimate.confidence_half_width, 0.0)
+
+
+class TestRangeEquity(unittest.TestCase):
+    def setUp(self):
+        self.monte_carlo = MonteCarlo(seed=0)
+        self.hole_pair_index = get_hole_pair_index()
+        self.pocket_kings = np.zeros(1326)
+        for hole_pair in ['SKHK', 'SKDK', 'SKCK', 'HKDK', 'HKCK', 'DKCK']:
+            self.pocket_kings[self.hole_pair_index.hole_pair_to_index(hole_pair)] = 1
+        self.turn = [Card('S', '6'), Card('S', '5'), Card('C', '2'), Card('D', '9')]
+
+    def test_alias_table(self):
+        alias_table = AliasTable([0, 1, 2, 0, 7])
+        rng = random.Random(0)
+        counts = np.bincount([alias_table.sample(rng.random()) for _ in range(20000)], minlength=5)
+        self.assertEqual(counts[0] + counts[3], 0)
+        self.assertTrue(np.allclose(counts / counts.sum(), [0, 0.1, 0.2, 0, 0.7], atol=0.01))
+
+    def test_uniform_range(self):
+        # A uniform range is the same as random opponent cards
+        self.assertAlmostEqual(
+            self.monte_carlo.evaluate_hole_pair_win_probability_against_ranges('SAHA', [np.ones(1326)], self.turn, exact=True),
+            self.monte_carlo.evaluate_hole_pair_win_probability('SAHA', 1, self.turn, exact=True))
+
+    def test_sampling_matches_enumeration(self):
+        exact_win_probability = self.monte_carlo.evaluate_hole_pair_win_probability_against_ranges(
+            'SAHA', [self.pocket_kings], self.turn, exact=True)
+        sampled_win_probability = self.monte_carlo.evaluate_hole_pair_win_probability_against_ranges(
+            'SAHA', [self.pocket_kings], self.turn, n_rollouts=5000, exact=False)
+        self.assertAlmostEqual(sampled_win_probability, exact_win_probability, delta=0.02)
+
+    def test_card_removal(self):
+        # The opponent with pocket kings never gets the king on the board, and never shares a card with the other opponent
+        remaining_kings = {Card('H', 'K').index, Card('D', 'K').index, Card('C', 'K').index}
+        rollout_sampler = RangeRolloutSampler([Card('S', 'A').index, Card('H', 'A').index], [Card('S', 'K').index],
+                                              [self.pocket_kings, np.ones(1326)])
+        for _ in range(100):
+            rollout_sampler.deal()
+            opponent_cards = rollout_sampler.deck[:4]
+            self.assertTrue(set(opponent_cards[:2]) <= remaining_kings)
+            self.assertEqual(len(set(opponent_cards)), 4)
+
+        with self.assertRaises(ValueError):
+            RangeRolloutSampler([Card('S', 'A').index, Card('H', 'A').index], [Card('S', 'K').index],
+                                [self.pocket_kings, self.pocket_kings]).deal()
+
+
+class TestPreflopEquityTable(unittest.TestCase):
+    def test_generate_save_and_load(self):
+        preflop_equity_table = PreflopEquityTable.generate(n_rollouts=50, seed=0)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'preflop_equity_table.npy')
+            self.assertIsNone(PreflopEquityTable.load(path))
+            preflop_equity_table.save(path)
+            loaded_table = PreflopEquityTable.load(path)
+
+        # Hole pairs in the same class share an entry
+        self.assertEqual(loaded_table.lookup('SAHA', 1),
+                         preflop_equity_table.lookup([Card('D', 'A'), Card('C', 'A')], 1))
+        self.assertEqual(loaded_table.lookup('S7H2', 3), loaded_table.lookup('C2D7', 3))
+        self.assertGreater(loaded_table.lookup('SAHA', 1), loaded_table.lookup('S7H2', 1))
+        self.assertIsNone(loaded_table.lookup('SAHA', 10))
+
+
+if __name__ == '__main__':
+    unittest.main()
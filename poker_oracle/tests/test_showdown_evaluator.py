@@ -0,0 +1,41 @@
+import unittest
+import numpy as np
+from poker_oracle.showdown_evaluator import ShowdownEvaluator
+from poker_oracle.utility_matrix import UtilityMatrixHandler
+from game_manager.deck_manager import Card
+
+
+class TestShowdownEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.utility_matrix_handler = UtilityMatrixHandler()
+        self.rng = np.random.default_rng(0)
+
+    def test_matches_utility_matrix(self):
+        for public_cards in [[Card('S', '6'), Card('S', '5'), Card('C', 'A'), Card('C', '2'), Card('C', '7')],
+                             [Card('D', '9'), Card('C', '9'), Card('S', '9'), Card('H', '9'), Card('D', 'A')]]:
+            self.utility_matrix_handler.generate_utility_matrix(public_cards)
+            utility_matrix = self.utility_matrix_handler.utility_matrix.to_dense()
+            showdown_evaluator = ShowdownEvaluator(public_cards)
+
+            opponent_ranges = self.rng.random((3, 1326))
+            self.assertTrue(np.allclose(showdown_evaluator.evaluate_showdown(opponent_ranges),
+                                        opponent_ranges @ utility_matrix.T))
+            self.assertTrue(np.allclose(showdown_evaluator.evaluate_showdown(opponent_ranges[0]),
+                                        utility_matrix @ opponent_ranges[0]))
+
+    def test_fold(self):
+        public_cards = [Card('S', '6'), Card('S', '5'), Card('C', 'A'), Card('C', '2'), Card('C', '7')]
+        showdown_evaluator = ShowdownEvaluator(public_cards)
+        is_possible = showdown_evaluator.is_possible
+        conflicts = showdown_evaluator.hole_pair_index.conflicts
+
+        opponent_range = self.rng.random(1326)
+        expected = (~conflicts).astype(np.float64) @ (opponent_range * is_possible) * is_possible
+        self.assertTrue(np.allclose(showdown_evaluator.evaluate_fold(opponent_range), expected))
+        # Against a uniform range, every possible hole pair is compatible with C(45, 2) opponent hole pairs
+        uniform_fold_values = showdown_evaluator.evaluate_fold(np.ones(1326))
+        self.assertTrue((uniform_fold_values[is_possible] == 990).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
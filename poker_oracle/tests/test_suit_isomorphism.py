@@ -0,0 +1,42 @@
+import unittest
+from math import comb
+from poker_oracle.suit_isomorphism import canonicalize, canonical_index, combination_index, get_canonical_boards, get_canonical_hole_pairs
+from game_manager.deck_manager import Card
+
+
+def to_indices(card_strings):
+    return [Card.from_string(card_string).index for card_string in card_strings]
+
+
+class TestSuitIsomorphism(unittest.TestCase):
+    def test_isomorphic_situations(self):
+        hole_cards = to_indices(['SA', 'HK'])
+        board = to_indices(['S2', 'S9', 'DK'])
+        # Spades -> clubs, hearts -> diamonds, diamonds -> hearts
+        isomorphic_hole_cards = to_indices(['CA', 'DK'])
+        isomorphic_board = to_indices(['HK', 'C9', 'C2'])
+        self.assertEqual(canonicalize(hole_cards, board),
+                         canonicalize(isomorphic_hole_cards, isomorphic_board))
+        self.assertEqual(canonical_index(hole_cards, board),
+                         canonical_index(isomorphic_hole_cards, isomorphic_board))
+
+        # The ace and the board spades no longer share a suit
+        self.assertNotEqual(canonical_index(hole_cards, board),
+                            canonical_index(to_indices(['DA', 'HK']), board))
+
+    def test_combination_index(self):
+        self.assertEqual(combination_index([0, 1, 2]), 0)
+        self.assertEqual(combination_index([49, 50, 51]), comb(52, 3) - 1)
+
+    def test_number_of_canonical_situations(self):
+        canonical_hole_pairs = get_canonical_hole_pairs()
+        self.assertEqual(len(canonical_hole_pairs), 169)
+        self.assertEqual(sum(canonical_hole_pairs.values()), 1326)
+
+        canonical_flops = get_canonical_boards(3)
+        self.assertEqual(len(canonical_flops), 1755)
+        self.assertEqual(sum(canonical_flops.values()), comb(52, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+from poker_oracle.training_data import TrainingDataGenerator, get_shard_path
+
+
+class TestTrainingDataGenerator(unittest.TestCase):
+    def test_generate_and_resume(self):
+        with tempfile.TemporaryDirectory() as directory:
+            training_data_generator = TrainingDataGenerator(
+                directory, n_board_cards=4, samples_per_shard=2, n_iterations=10, seed=1)
+            training_data_generator.generate(2)
+            self.assertEqual(training_data_generator.get_completed_shards(), [0, 1])
+
+            shards = list(training_data_generator.load_shards())
+            self.assertEqual(shards[0]['ranges'].shape, (2, 2, 1326))
+            self.assertEqual(shards[0]['boards'][0, -1], -1)
+            for shard in shards:
+                # Whatever one player wins, the other loses
+                self.assertTrue(np.allclose((shard['ranges'] * shard['values']).sum(axis=(1, 2)), 0, atol=1e-4))
+                # Nobody can win or lose more than the 100 chips they started with
+                chips = shard['values'] * shard['pots'][:, None, None] / 2
+                self.assertTrue((np.abs(chips) <= 100 + 1e-3).all())
+
+            # A lost shard is generated again exactly as before, and finished shards are kept
+            os.remove(get_shard_path(directory, 1))
+            TrainingDataGenerator(directory, n_board_cards=4, samples_per_shard=2, n_iterations=10, seed=1).generate(3, workers=2)
+            resumed_shards = list(training_data_generator.load_shards())
+            self.assertEqual(len(resumed_shards), 3)
+            self.assertTrue(np.array_equal(resumed_shards[1]['values'], shards[1]['values']))
+
+            with self.assertRaises(ValueError):
+                TrainingDataGenerator(directory, n_board_cards=3, samples_per_shard=2, n_iterations=10, seed=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import numpy as np
+from poker_oracle.utility_matrix import UtilityMatrixHandler
+from poker_oracle.hole_pairs import get_hole_pair_index
+from poker_oracle.hands_evaluator.hands_evaluator import HandsEvaluator
+from game_manager.deck_manager import Card
+from game_manager.player import Player
+
+
+class TestUtilityMatrixHandler(unittest.TestCase):
+    def setUp(self):
+        self.utility_matrix_handler = UtilityMatrixHandler()
+        self.public_cards = [Card('S', '6'), Card('S', '5'), Card('C', 'A'), Card('C', '2'), Card('C', '7')]
+        self.utility_matrix_handler.generate_utility_matrix(self.public_cards)
+
+    def get_utility_from_get_winner(self, player_1_card_index, player_2_card_index):
+        player_1 = Player()
+        player_2 = Player()
+        player_1.hand = [Card.from_index(int(card))
+                         for card in self.utility_matrix_handler.hole_pair_cards[player_1_card_index]]
+        player_2.hand = [Card.from_index(int(card))
+                         for card in self.utility_matrix_handler.hole_pair_cards[player_2_card_index]]
+        if len(set(player_1.hand + player_2.hand + self.public_cards)) < 9:
+            return 0
+
+        winners = HandsEvaluator().get_winner([player_1, player_2], self.public_cards)
+        if len(winners) == 2:
+            return 0
+        return 1 if player_1 in winners else -1
+
+    def test_matches_get_winner(self):
+        utility_matrix = self.utility_matrix_handler.utility_matrix
+        rng = np.random.default_rng(0)
+        for player_1_card_index, player_2_card_index in rng.integers(0, 1326, size=(500, 2)):
+            self.assertEqual(utility_matrix[player_1_card_index, player_2_card_index],
+                             self.get_utility_from_get_winner(player_1_card_index, player_2_card_index))
+
+    def test_antisymmetric(self):
+        utility_matrix = self.utility_matrix_handler.utility_matrix.to_dense()
+        self.assertTrue((utility_matrix == -utility_matrix.T).all())
+        self.assertTrue((np.diag(utility_matrix) == 0).all())
+
+    def test_array_accessors(self):
+        dense_matrix = self.utility_matrix_handler.utility_matrix.to_dense()
+        triangular_handler = UtilityMatrixHandler(layout='triangular')
+        triangular_handler.generate_utility_matrix(self.public_cards)
+        ranges = np.random.default_rng(0).random((3, 1326))
+        for utility_matrix in [self.utility_matrix_handler.utility_matrix, triangular_handler.utility_matrix]:
+            self.assertEqual(utility_matrix.shape, (1326, 1326))
+            self.assertTrue((np.asarray(utility_matrix) == dense_matrix).all())
+            self.assertTrue(np.allclose(utility_matrix @ ranges[0], dense_matrix @ ranges[0]))
+            self.assertTrue(np.allclose(utility_matrix @ ranges.T, dense_matrix @ ranges.T))
+            self.assertTrue(np.allclose(ranges @ utility_matrix, ranges @ dense_matrix))
+            self.assertTrue((utility_matrix[5] == dense_matrix[5]).all())
+            self.assertTrue((utility_matrix[:10, 3] == dense_matrix[:10, 3]).all())
+            self.assertEqual(utility_matrix[7, 900], dense_matrix[7, 900])
+
+    def test_triangular_layout(self):
+        triangular_handler = UtilityMatrixHandler(dtype=np.int8, layout='triangular')
+        triangular_handler.generate_utility_matrix(self.public_cards)
+        triangular_matrix = triangular_handler.utility_matrix
+        dense_matrix = self.utility_matrix_handler.utility_matrix.to_dense()
+
+        self.assertEqual(triangular_matrix.nbytes, 1326 * 1325 // 2)
+        self.assertTrue((triangular_matrix.to_dense() == dense_matrix).all())
+        for hole_pair in [0, 1, 700, 1325]:
+            self.assertTrue((triangular_matrix.row(hole_pair) == dense_matrix[hole_pair]).all())
+            self.assertTrue((triangular_matrix.column(hole_pair) == dense_matrix[:, hole_pair]).all())
+            self.assertEqual(triangular_matrix[hole_pair, 700], dense_matrix[hole_pair, 700])
+
+        opponent_range = np.random.default_rng(0).random(1326)
+        self.assertTrue(np.allclose(triangular_matrix.dot(opponent_range), dense_matrix @ opponent_range))
+
+
+class TestHolePairIndex(unittest.TestCase):
+    def setUp(self):
+        self.hole_pair_index = get_hole_pair_index()
+
+    def test_lookups(self):
+        self.assertEqual(self.hole_pair_index.hole_pair_to_index('C2C3'), 0)
+        self.assertEqual(self.hole_pair_index.hole_pair_to_index('SASK'), 1325)
+        index = self.hole_pair_index.hole_pair_to_index('HTD4')
+        self.assertEqual(self.hole_pair_index.index_to_hole_pair(index), 'D4HT')
+        self.assertEqual(index, self.hole_pair_index.hole_pair_to_index([Card('D', '4'), Card('H', 'T')]))
+
+    def test_conflicts(self):
+        conflicts = self.hole_pair_index.conflicts
+        # Each hole pair shares a card with itself and 2 * 50 other hole pairs
+        self.assertTrue((conflicts.sum(axis=1) == 101).all())
+
+        card = Card('H', 'Q').index
+        hole_pairs_with_card = self.hole_pair_index.hole_pairs_with_card[card]
+        self.assertEqual(len(set(hole_pairs_with_card.tolist())), 51)
+        self.assertTrue((self.hole_pair_index.hole_pair_cards[hole_pairs_with_card] == card).any(axis=1).all())
+
+        is_possible = self.hole_pair_index.get_possible_hole_pairs([card, Card('S', '2').index])
+        self.assertEqual(np.count_nonzero(is_possible), 1326 - 51 - 51 + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+from poker_oracle.utility_matrix import UtilityMatrixHandler
+from poker_oracle.utility_matrix_store import UtilityMatrixStore, generate_utility_matrix_store, get_store_size
+from game_manager.deck_manager import Card
+
+
+class TestUtilityMatrixStore(unittest.TestCase):
+    def setUp(self):
+        self.boards = [[Card.from_string(card).index for card in board]
+                       for board in [['S6', 'S5', 'CA', 'C2', 'C7'], ['HK', 'HQ', 'HJ', 'D2', 'C2'], ['D9', 'C9', 'S9', 'H9', 'DA']]]
+        self.utility_matrix_handler = UtilityMatrixHandler()
+
+    def get_expected_utility_matrix(self, board):
+        self.utility_matrix_handler.generate_utility_matrix(
+            [Card.from_index(card) for card in board])
+        return self.utility_matrix_handler.utility_matrix.to_dense()
+
+    def test_lookup(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'store')
+            generate_utility_matrix_store(path, self.boards)
+            store = UtilityMatrixStore(path)
+            for board in self.boards:
+                utility_matrix = store.lookup(board)
+                permutation = store.get_hole_pair_permutation(board)
+                self.assertTrue(np.shares_memory(utility_matrix.upper_triangle, store.matrices))
+                self.assertTrue((utility_matrix.to_dense()[np.ix_(permutation, permutation)]
+                                 == self.get_expected_utility_matrix(board)).all())
+
+            # An isomorphic board uses the same matrix
+            isomorphic_board = [Card.from_string(card).index for card in ['D6', 'D5', 'HA', 'H2', 'H7']]
+            self.assertEqual(store.get_board_index(isomorphic_board), store.get_board_index(self.boards[0]))
+            permutation = store.get_hole_pair_permutation(isomorphic_board)
+            self.assertTrue((store.lookup(isomorphic_board).to_dense()[np.ix_(permutation, permutation)]
+                             == self.get_expected_utility_matrix(isomorphic_board)).all())
+
+            with self.assertRaises(KeyError):
+                store.lookup([Card.from_string(card).index for card in ['S2', 'S3', 'S4', 'S5', 'S7']])
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'store')
+            store = UtilityMatrixStore.create(path, self.boards)
+            store.mark_completed([0])
+            with self.assertRaises(KeyError):
+                store.lookup(store.boards[1].tolist())
+
+            # Board 0 is already marked as completed, so only the other boards are generated
+            store = generate_utility_matrix_store(path, workers=2, boards_per_task=1)
+            self.assertTrue(store.completed.all())
+            self.assertTrue((store.matrices[0] == 0).all())
+            board = store.boards[1].tolist()
+            self.assertTrue((store.lookup(board).to_dense() == self.get_expected_utility_matrix(board)).all())
+
+
+    def test_max_boards(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'store')
+            store = generate_utility_matrix_store(path, self.boards, max_boards=2)
+            self.assertEqual(len(store.boards), 2)
+            self.assertEqual(store.matrices.nbytes, get_store_size(2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+from poker_oracle.value_network import CounterfactualValueNetwork
+from poker_oracle.leaf_evaluator import ValueNetworkLeafEvaluator
+from game_manager.deck_manager import Card
+
+
+class TestCounterfactualValueNetwork(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.value_network = CounterfactualValueNetwork.initialize([64, 64], rng=rng)
+        self.board_cards = [Card('S', '6').index, Card('S', '5').index, Card('C', 'A').index]
+        ranges = rng.random((5, 2, 1326))
+        self.ranges = ranges / ranges.sum(axis=-1, keepdims=True)
+        self.pots = np.array([20, 40, 60, 80, 100], dtype=np.float64)
+
+    def test_zero_sum(self):
+        values = self.value_network.predict(self.pots, self.board_cards, self.ranges)
+        self.assertEqual(values.shape, (5, 2, 1326))
+        self.assertTrue(np.allclose((values * self.ranges).sum(axis=(1, 2)), 0, atol=1e-4))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'value_network.npz')
+            self.assertIsNone(CounterfactualValueNetwork.load(path))
+            self.value_network.save(path)
+            loaded_value_network = CounterfactualValueNetwork.load(path)
+        self.assertTrue(np.array_equal(loaded_value_network.predict(self.pots, self.board_cards, self.ranges),
+                                       self.value_network.predict(self.pots, self.board_cards, self.ranges)))
+
+    def test_leaf_evaluator(self):
+        leaf_evaluator = ValueNetworkLeafEvaluator(self.value_network, [Card.from_index(card) for card in self.board_cards])
+        expected_utilities = leaf_evaluator.get_expected_utilities(self.pots, self.ranges)
+        # Reach probabilities are normalized before the network, and scale the utilities of the other player
+        scaled_ranges = self.ranges * np.array([0.5, 0.25])[None, :, None]
+        scaled_expected_utilities = leaf_evaluator.get_expected_utilities(self.pots, scaled_ranges)
+        self.assertTrue(np.allclose(scaled_expected_utilities[:, 0], 0.25 * expected_utilities[:, 0], atol=1e-6))
+        self.assertTrue(np.allclose(scaled_expected_utilities[:, 1], 0.5 * expected_utilities[:, 1], atol=1e-6))
+
+
+if __name__ == '__main__':
+    unittest.main()
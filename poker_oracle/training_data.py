@@ -0,0 +1,166 @@
+from typing import Iterator, List, Tuple
+from multiprocessing import Pool
+from game_manager.deck_manager import Card, NUMBER_OF_CARDS
+from game_manager.pivotal_parameters import pivotal_parameters as piv
+from poker_oracle.hole_pairs import get_hole_pair_index, NUMBER_OF_HOLE_PAIRS
+from poker_oracle.leaf_evaluator import UtilityMatrixLeafEvaluator
+from poker_oracle.showdown_evaluator import ShowdownEvaluator
+from resolvers.cfr_plus import CFRPlusSolver, build_betting_tree
+
+import argparse
+import json
+import os
+import time
+import numpy as np
+
+SAMPLES_PER_SHARD = 100
+N_ITERATIONS = 100
+# Cards dealt on the street after a leaf with this many cards on the board
+N_NEXT_STREET_CARDS = {0: 3, 3: 1, 4: 1}
+MAX_BOARD_CARDS = 5
+
+# Generated with `make training_data`
+TRAINING_DATA_PATH = os.path.join(os.path.dirname(__file__), 'training_data')
+
+
+def sample_situation(rng: np.random.Generator, n_board_cards: int) -> Tuple[float, List[int], np.ndarray]:
+    # A random leaf at the end of a street: pot, board card indices and normalized ranges (2, 1326) of both players.
+    # The ranges are random weights over the hole pairs the board allows, some flat and some concentrated
+    board = rng.choice(NUMBER_OF_CARDS, n_board_cards, replace=False).tolist()
+    pot = rng.uniform(4 * piv.small_blind, 2 * piv.starting_chips_per_player)
+    is_possible = get_hole_pair_index().get_possible_hole_pairs(board)
+    concentrations = np.exp(rng.uniform(0, np.log(8), size=(2, 1)))
+    ranges = rng.random((2, NUMBER_OF_HOLE_PAIRS)) ** concentrations * is_possible
+    return pot, board, ranges / ranges.sum(axis=1, keepdims=True)
+
+
+def solve_situation(pot: float, board: List[int], ranges: np.ndarray, rng: np.random.Generator, n_iterations=N_ITERATIONS) -> np.ndarray:
+    # Deals the next street and solves it with CFR+ from equal contributions. Returns the values (2, 1326) in the units
+    # of the leaf evaluators: chips won per unit of opponent range, in units of half the pot. Betting on the next street
+    # can win more than that, so the values are not limited to [-1, 1]. Over random next cards, they average to the
+    # value of the leaf
+    remaining_cards = np.setdiff1d(np.arange(NUMBER_OF_CARDS), board)
+    next_board = board + rng.choice(remaining_cards, N_NEXT_STREET_CARDS[len(board)], replace=False).tolist()
+    public_cards = [Card.from_index(card) for card in next_board]
+    # Hole pairs with the new cards can no longer be held, which the value of the leaf averages in as 0
+    is_possible = get_hole_pair_index().get_possible_hole_pairs(next_board)
+    ranges = ranges * is_possible
+
+    stack = piv.starting_chips_per_player - pot / 2
+    root = build_betting_tree([pot / 2, pot / 2], [stack, stack], 2 * piv.small_blind)
+    if len(next_board) == MAX_BOARD_CARDS:
+        leaf_evaluator = ShowdownEvaluator(public_cards)
+    else:
+        leaf_evaluator = UtilityMatrixLeafEvaluator.from_public_cards(public_cards, rng=rng)
+    solver = CFRPlusSolver(root, leaf_evaluator)
+    solver.solve(ranges, n_iterations)
+    # With equal contributions and no dead money, a value in chips is the expected utility times half the pot
+    return solver.get_average_strategy_values(ranges) / (pot / 2) * is_possible
+
+
+def generate_shard(task) -> int:
+    # Worker entry point. Every shard has its own seed, so a shard is the same whether it is generated first or
+    # after a restart. Written to a temporary file first, so an interrupted write never looks like a finished shard
+    path, shard_index, config = task
+    rng = np.random.default_rng(np.random.SeedSequence(
+        config['seed'], spawn_key=(shard_index,)))
+    n_samples = config['samples_per_shard']
+    pots = np.zeros(n_samples, dtype=np.float32)
+    boards = np.full((n_samples, MAX_BOARD_CARDS), -1, dtype=np.int8)
+    ranges = np.zeros((n_samples, 2, NUMBER_OF_HOLE_PAIRS), dtype=np.float32)
+    values = np.zeros((n_samples, 2, NUMBER_OF_HOLE_PAIRS), dtype=np.float32)
+    for i in range(n_samples):
+        pot, board, situation_ranges = sample_situation(rng, config['n_board_cards'])
+        pots[i] = pot
+        boards[i, :len(board)] = board
+        ranges[i] = situation_ranges
+        values[i] = solve_situation(pot, board, situation_ranges, rng, config['n_iterations'])
+
+    shard_path = get_shard_path(path, shard_index)
+    temporary_path = shard_path + '.tmp.npz'
+    np.savez_compressed(temporary_path, pots=pots, boards=boards, ranges=ranges, values=values)
+    os.replace(temporary_path, shard_path)
+    return shard_index
+
+
+def get_shard_path(path: str, shard_index: int) -> str:
+    return os.path.join(path, f'shard_{shard_index:06d}.npz')
+
+
+class TrainingDataGenerator:
+    """
+    Writes training data for CounterfactualValueNetwork as compressed shards of solved situations in a directory.
+    Each shard is one task for a process pool. Finished shards are skipped, so running the generator again
+    with the same directory resumes it. config.json pins the settings, and progress.json is updated after every shard
+    """
+
+    def __init__(self, path=TRAINING_DATA_PATH, n_board_cards=4, samples_per_shard=SAMPLES_PER_SHARD,
+                 n_iterations=N_ITERATIONS, seed=0) -> None:
+        if n_board_cards not in N_NEXT_STREET_CARDS:
+            raise ValueError(f'Leaves have 0, 3 or 4 board cards, not {n_board_cards}')
+        self.path = path
+        self.config = {'n_board_cards': n_board_cards, 'samples_per_shard': samples_per_shard,
+                       'n_iterations': n_iterations, 'seed': seed}
+
+        os.makedirs(path, exist_ok=True)
+        config_path = os.path.join(path, 'config.json')
+        if os.path.exists(config_path):
+            with open(config_path) as config_file:
+                saved_config = json.load(config_file)
+            if saved_config != self.config:
+                raise ValueError(f'{path} was generated with {saved_config}, not {self.config}')
+        else:
+            with open(config_path, 'w') as config_file:
+                json.dump(self.config, config_file)
+
+    def get_completed_shards(self) -> List[int]:
+        return sorted(int(file_name[len('shard_'):-len('.npz')]) for file_name in os.listdir(self.path)
+                      if file_name.startswith('shard_') and file_name.endswith('.npz') and '.tmp' not in file_name)
+
+    def generate(self, n_shards: int, workers=1, verbose=False) -> None:
+        # Generates the shards 0..n_shards - 1 that are missing, in any order
+        completed_shards = set(self.get_completed_shards())
+        tasks = [(self.path, shard_index, self.config)
+                 for shard_index in range(n_shards) if shard_index not in completed_shards]
+        start_time = time.time()
+
+        def shard_completed(n_generated_shards):
+            progress = {'completed_shards': len(completed_shards) + n_generated_shards, 'n_shards': n_shards,
+                        'samples_per_second': n_generated_shards * self.config['samples_per_shard'] / (time.time() - start_time)}
+            with open(os.path.join(self.path, 'progress.json'), 'w') as progress_file:
+                json.dump(progress, progress_file)
+            if verbose:
+                print(progress)
+
+        if workers > 1:
+            # Fresh worker processes now and then, so that a run of several days does not accumulate memory
+            with Pool(workers, maxtasksperchild=100) as pool:
+                for n_generated_shards, _ in enumerate(pool.imap_unordered(generate_shard, tasks), start=1):
+                    shard_completed(n_generated_shards)
+        else:
+            for n_generated_shards, task in enumerate(tasks, start=1):
+                generate_shard(task)
+                shard_completed(n_generated_shards)
+
+    def load_shards(self) -> Iterator[dict]:
+        # Streams the finished shards one at a time, as dicts of pots, boards, ranges and values
+        for shard_index in self.get_completed_shards():
+            with np.load(get_shard_path(self.path, shard_index)) as shard:
+                yield {name: shard[name] for name in shard.files}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Generates training data for the counterfactual value network. Run it again to resume')
+    parser.add_argument('--path', default=TRAINING_DATA_PATH)
+    parser.add_argument('--board-cards', type=int, default=4, choices=sorted(N_NEXT_STREET_CARDS))
+    parser.add_argument('--shards', type=int, default=10000)
+    parser.add_argument('--samples-per-shard', type=int, default=SAMPLES_PER_SHARD)
+    parser.add_argument('--iterations', type=int, default=N_ITERATIONS)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    training_data_generator = TrainingDataGenerator(
+        args.path, args.board_cards, args.samples_per_shard, args.iterations, args.seed)
+    training_data_generator.generate(args.shards, args.workers, verbose=True)
@@ -1,79 +1,241 @@
-from poker_oracle.monte_carlo import MonteCarlo
+from poker_oracle.hole_pairs import get_hole_pair_index, NUMBER_OF_HOLE_PAIRS
 from poker_oracle.hands_evaluator.hands_evaluator import HandsEvaluator
-from game_manager.player import Player
+from poker_oracle.hands_evaluator.rank_evaluator import evaluate_card_indices_batch
 from game_manager.deck_manager import Card
+from functools import lru_cache
 
 import numpy as np
 
-class UtilityMatrixHandler:
-    NUMBER_OF_HOLE_PAIRS = 1326
 
-    def __init__(self):
-        self.utility_matrix = self.generate_empty_utility_matrix()
-        self.all_hole_pairs = MonteCarlo().get_all_possible_hole_pairs()
-        self.player_1 = Player()
-        self.player_2 = Player()
+class DenseUtilityMatrix:
+    """
+    The full 1326x1326 matrix. utility_matrix[i, j] is the utility of hole pair i against hole pair j.
+    Both layouts also work as arrays: np.asarray, shape, @ and numpy indexing
+    """
+
+    def __init__(self, matrix: np.ndarray) -> None:
+        self.matrix = matrix
+
+    def __getitem__(self, indices):
+        return self.matrix[indices]
+
+    def row(self, i: int) -> np.ndarray:
+        return self.matrix[i]
+
+    def column(self, j: int) -> np.ndarray:
+        return self.matrix[:, j]
+
+    def dot(self, vector: np.ndarray) -> np.ndarray:
+        # Utility of every hole pair against a range over the opponent's hole pairs
+        return self.matrix @ vector
+
+    def to_dense(self) -> np.ndarray:
+        return self.matrix
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes
+
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+    def __array__(self, dtype=None):
+        return self.matrix if dtype is None else self.matrix.astype(dtype)
+
+    def __matmul__(self, other):
+        return self.matrix @ other
+
+    def __rmatmul__(self, other):
+        return other @ self.matrix
+
+    def __str__(self):
+        return str(self.matrix)
+
+
+class TriangularUtilityMatrix:
+    """
+    Stores only the entries above the diagonal, row by row, since the matrix is antisymmetric:
+    utility_matrix[j, i] == -utility_matrix[i, j] and the diagonal is 0. Half the size of the dense layout
+    """
+
+    def __init__(self, upper_triangle: np.ndarray) -> None:
+        self.upper_triangle = upper_triangle
+
+    @classmethod
+    def from_dense(cls, matrix: np.ndarray) -> 'TriangularUtilityMatrix':
+        return cls(matrix[get_triangular_layout().is_above_diagonal])
+
+    def __getitem__(self, indices):
+        if isinstance(indices, (int, np.integer)):
+            return self.row(indices)
+        if not (isinstance(indices, tuple) and len(indices) == 2 and
+                all(isinstance(index, (int, np.integer)) for index in indices)):
+            # Slices and index arrays go through the dense matrix
+            return self.to_dense()[indices]
+        i, j = indices
+        if i == j:
+            return self.upper_triangle.dtype.type(0)
+        if i < j:
+            return self.upper_triangle[get_triangular_layout().row_offsets[i] + j - i - 1]
+        return -self.upper_triangle[get_triangular_layout().row_offsets[j] + i - j - 1]
+
+    def row(self, i: int) -> np.ndarray:
+        row_offsets = get_triangular_layout().row_offsets
+        row = np.zeros(NUMBER_OF_HOLE_PAIRS, dtype=self.upper_triangle.dtype)
+        row[i + 1:] = self.upper_triangle[row_offsets[i]:row_offsets[i + 1]]
+        columns_before = np.arange(i)
+        row[:i] = -self.upper_triangle[row_offsets[columns_before] + i - columns_before - 1]
+        return row
+
+    def column(self, j: int) -> np.ndarray:
+        return -self.row(j)
+
+    def dot(self, vector: np.ndarray) -> np.ndarray:
+        # With U the upper triangle, the matrix is U - U^T
+        triangular_layout = get_triangular_layout()
+        rows, columns = triangular_layout.rows, triangular_layout.columns
+        upper_product = np.bincount(rows, weights=self.upper_triangle * vector[columns],
+                                    minlength=NUMBER_OF_HOLE_PAIRS)
+        lower_product = np.bincount(columns, weights=self.upper_triangle * vector[rows],
+                                    minlength=NUMBER_OF_HOLE_PAIRS)
+        return upper_product - lower_product
+
+    def to_dense(self) -> np.ndarray:
+        is_above_diagonal = get_triangular_layout().is_above_diagonal
+        matrix = np.zeros(is_above_diagonal.shape,
+                          dtype=self.upper_triangle.dtype)
+        matrix[is_above_diagonal] = self.upper_triangle
+        return matrix - matrix.T
+
+    @property
+    def nbytes(self) -> int:
+        return self.upper_triangle.nbytes
+
+    @property
+    def shape(self):
+        return (NUMBER_OF_HOLE_PAIRS, NUMBER_OF_HOLE_PAIRS)
+
+    def __array__(self, dtype=None):
+        matrix = self.to_dense()
+        return matrix if dtype is None else matrix.astype(dtype)
+
+    def __matmul__(self, other):
+        other = np.asarray(other)
+        if other.ndim == 1:
+            return self.dot(other)
+        return self.to_dense() @ other
+
+    def __rmatmul__(self, other):
+        # The matrix is antisymmetric, so other @ U is -(U @ other^T)^T
+        return -(self @ np.asarray(other).T).T
+
+    def __str__(self):
+        return str(self.to_dense())
 
-        self.player_1.hand = [Card('S', 'A'), Card('S', '2')]
-        self.player_2.hand = [Card('S', '3'), Card('S', '4')]
+
+class TriangularLayout:
+    # Index arrays shared by all TriangularUtilityMatrix objects
+
+    def __init__(self) -> None:
+        self.is_above_diagonal = np.triu(
+            np.ones((NUMBER_OF_HOLE_PAIRS, NUMBER_OF_HOLE_PAIRS), dtype=bool), k=1)
+        rows, columns = np.nonzero(self.is_above_diagonal)
+        self.rows = rows.astype(np.int16)
+        self.columns = columns.astype(np.int16)
+        # Start of each row in the upper triangle, with the total length at the end
+        row_lengths = NUMBER_OF_HOLE_PAIRS - 1 - np.arange(NUMBER_OF_HOLE_PAIRS)
+        self.row_offsets = np.concatenate([[0], np.cumsum(row_lengths)])
+
+
+@lru_cache(maxsize=None)
+def get_triangular_layout() -> TriangularLayout:
+    return TriangularLayout()
+
+
+def get_hole_pair_strengths(public_cards):
+    # Strength of each hole pair together with the public cards, -1 for hole pairs that share a card with them
+    hole_pair_index = get_hole_pair_index()
+    board = [card.index for card in public_cards]
+    is_possible = hole_pair_index.get_possible_hole_pairs(board)
+
+    hands = np.hstack([hole_pair_index.hole_pair_cards[is_possible],
+                       np.tile(np.array(board, dtype=np.int64), (np.count_nonzero(is_possible), 1))])
+    strengths = np.full(NUMBER_OF_HOLE_PAIRS, -1, dtype=np.int64)
+    strengths[is_possible] = evaluate_card_indices_batch(hands)
+    return strengths
+
+
+class UtilityMatrixHandler:
+    NUMBER_OF_HOLE_PAIRS = NUMBER_OF_HOLE_PAIRS
+    LAYOUTS = ['dense', 'triangular']
+
+    def __init__(self, dtype=np.int64, layout='dense'):
+        # dtype=np.int8 with layout='triangular' takes 0.9 MB per board instead of 14 MB
+        if layout not in self.LAYOUTS:
+            raise ValueError(f'Unknown layout {layout}, expected one of {self.LAYOUTS}')
+        self.dtype = dtype
+        self.layout = layout
+        self.utility_matrix = self.generate_empty_utility_matrix()
+        self.hole_pair_index = get_hole_pair_index()
+        self.all_hole_pairs = self.hole_pair_index.hole_pair_strings
+        self.hole_pair_cards = self.hole_pair_index.hole_pair_cards
 
         self.hands_evaluator = HandsEvaluator()
 
+    def create_utility_matrix(self, matrix):
+        # Wraps a dense matrix in the layout of the handler. Use row, column, dot or [i, j] to read it
+        matrix = matrix.astype(self.dtype, copy=False)
+        if self.layout == 'triangular':
+            return TriangularUtilityMatrix.from_dense(matrix)
+        return DenseUtilityMatrix(matrix)
+
     def generate_empty_utility_matrix(self):
-        return np.array([[0 for j in range(self.NUMBER_OF_HOLE_PAIRS)] for i in range(self.NUMBER_OF_HOLE_PAIRS)])
+        return self.create_utility_matrix(np.zeros((self.NUMBER_OF_HOLE_PAIRS, self.NUMBER_OF_HOLE_PAIRS), dtype=self.dtype))
 
-    def generate_utility_matrix(self, public_cards):
-        self.utility_matrix = self.generate_empty_utility_matrix()
+    def get_hole_pair_strengths(self, public_cards):
+        return get_hole_pair_strengths(public_cards)
 
-        for player_1_card_index in range(self.NUMBER_OF_HOLE_PAIRS):
-            player_1_cards = [self.all_hole_pairs[player_1_card_index][:2], self.all_hole_pairs[player_1_card_index][2:]]
-            self.player_1.hand = self.get_player_cards(self.player_1, player_1_cards)
-            for player_2_card_index in range(player_1_card_index + 1, self.NUMBER_OF_HOLE_PAIRS):
-                player_2_cards = [self.all_hole_pairs[player_2_card_index][:2], self.all_hole_pairs[player_2_card_index][2:]]
-
-                if self.check_duplicate_cards(public_cards, player_1_cards, player_2_cards):
-                    utility = 0 
-                else:
-                    self.player_2.hand = self.get_player_cards(self.player_2, player_2_cards)
-                    utility = self.calculate_utility(public_cards)
-                
-                self.set_inverse_mirrored_utilities(player_1_card_index, player_2_card_index, utility)
-
-    def set_inverse_mirrored_utilities(self, player_1_card_index, player_2_card_index, value):
-        self.utility_matrix[player_1_card_index][player_2_card_index] = value
-        self.utility_matrix[player_2_card_index][player_1_card_index] = -value
-
-
-    def calculate_utility(self, public_cards):
-        winners = self.hands_evaluator.get_winner([self.player_1, self.player_2], public_cards)
-        if len(winners) == 2:
-            return 0
-        elif self.player_1 in winners:
-            return 1
-        return -1
-    
-
-    def check_duplicate_cards(self, public_cards, player_1_cards, player_2_cards):
-        public_cards_as_str = [str(card) for card in public_cards]
-        all_cards_as_str = public_cards_as_str + player_1_cards + player_2_cards
-        return len(set(all_cards_as_str)) != len(all_cards_as_str)
+    def generate_utility_matrix(self, public_cards):
+        # utility_matrix[i, j] is 1 if hole pair i beats hole pair j on the board, -1 if it loses,
+        # and 0 for ties and for hole pairs that share cards with each other or with the board
+        strengths = self.get_hole_pair_strengths(public_cards)
+        matrix = np.sign(strengths[:, None] - strengths[None, :]).astype(self.dtype)
+
+        is_blocked = strengths < 0
+        matrix[self.hole_pair_index.conflicts
+               | is_blocked[:, None] | is_blocked[None, :]] = 0
+        self.utility_matrix = self.create_utility_matrix(matrix)
+
+    def generate_expected_utility_matrix(self, public_cards, n_boards=16, rng=None):
+        # Before the river: utilities averaged over n_boards random completions of the board, as float32.
+        # Each entry is only averaged over the boards that share no card with either hole pair
+        rng = np.random.default_rng() if rng is None else rng
+        known_cards = [card.index for card in public_cards]
+        remaining_cards = np.setdiff1d(np.arange(52), known_cards)
+        n_cards_to_deal = 5 - len(public_cards)
+
+        utility_sums = np.zeros((self.NUMBER_OF_HOLE_PAIRS, self.NUMBER_OF_HOLE_PAIRS), dtype=np.float32)
+        board_counts = np.zeros((self.NUMBER_OF_HOLE_PAIRS, self.NUMBER_OF_HOLE_PAIRS), dtype=np.float32)
+        for _ in range(n_boards):
+            board = known_cards + rng.choice(remaining_cards, n_cards_to_deal, replace=False).tolist()
+            strengths = self.get_hole_pair_strengths([Card.from_index(card) for card in board])
+            is_possible = strengths >= 0
+            is_compatible = is_possible[:, None] & is_possible[None, :]
+            utility_sums += np.sign(strengths[:, None] - strengths[None, :]) * is_compatible
+            board_counts += is_compatible
+
+        expected_utility_matrix = np.divide(utility_sums, board_counts, out=np.zeros_like(utility_sums),
+                                            where=board_counts > 0)
+        expected_utility_matrix[self.hole_pair_index.conflicts] = 0
+        return expected_utility_matrix
 
     def __str__(self):
         return str(self.utility_matrix)
 
 
-    def get_player_cards(self, player, cards_as_str):
-        player.hand[0].suit = cards_as_str[0][0]
-        player.hand[0].value = cards_as_str[0][1]
-        player.hand[1].suit = cards_as_str[1][0]
-        player.hand[1].value = cards_as_str[1][1]
-
-        return player.hand
-    
-
 if __name__ == "__main__":
     utility_matrix_handler = UtilityMatrixHandler()
 
     public_cards = [Card('S', '6'), Card('S', '5'), Card('C', 'A'), Card('C', '2'), Card('C', '7')]
     utility_matrix_handler.generate_utility_matrix(public_cards)
-    
\ No newline at end of file
@@ -0,0 +1,165 @@
+from typing import Iterable, Optional, Sequence
+from multiprocessing import Pool
+from game_manager.deck_manager import Card
+from poker_oracle.hole_pairs import get_hole_pair_index, NUMBER_OF_HOLE_PAIRS
+from poker_oracle.rollout_sampler import NUMBER_OF_COMMUNITY_CARDS
+from poker_oracle.suit_isomorphism import get_canonical_boards, get_canonical_suits, relabel_suits, canonicalize_board, combination_index
+from poker_oracle.utility_matrix import UtilityMatrixHandler, TriangularUtilityMatrix
+
+import argparse
+import os
+import numpy as np
+
+# Upper triangle of a 1326x1326 utility matrix, see TriangularUtilityMatrix
+UPPER_TRIANGLE_SIZE = NUMBER_OF_HOLE_PAIRS * (NUMBER_OF_HOLE_PAIRS - 1) // 2
+BOARDS_PER_TASK = 64
+
+# Generated with `make utility_matrix_store`
+UTILITY_MATRIX_STORE_PATH = os.path.join(
+    os.path.dirname(__file__), 'utility_matrix_store')
+
+
+class UtilityMatrixStore:
+    """
+    River utility matrices for a fixed set of canonical boards, in a directory of .npy files:
+    boards.npy (n_boards, 5) sorted by combination index, matrices.npy (n_boards, 878475) int8 upper triangles,
+    and completed.npy (n_boards,) flags for the boards that have been generated. matrices.npy is memory-mapped,
+    so opening the store is cheap and lookups return views into the file
+    """
+
+    def __init__(self, path: str, mode: str = 'r') -> None:
+        self.path = path
+        self.boards = np.load(os.path.join(path, 'boards.npy'))
+        self.board_combination_indices = np.array(
+            [combination_index(board) for board in self.boards.tolist()], dtype=np.int64)
+        self.matrices = np.load(os.path.join(
+            path, 'matrices.npy'), mmap_mode=mode)
+        self.completed = np.load(os.path.join(
+            path, 'completed.npy'), mmap_mode=mode)
+
+    @classmethod
+    def create(cls, path: str, boards: Iterable[Sequence[int]]) -> 'UtilityMatrixStore':
+        # boards are card indices. Isomorphic boards share one matrix, so only canonical boards are stored
+        canonical_boards = sorted({canonicalize_board(board) for board in boards},
+                                  key=combination_index)
+        if any(len(board) != NUMBER_OF_COMMUNITY_CARDS for board in canonical_boards):
+            raise ValueError('Only river boards with 5 cards can be stored')
+
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'boards.npy'),
+                np.array(canonical_boards, dtype=np.int8).reshape(-1, NUMBER_OF_COMMUNITY_CARDS))
+        np.lib.format.open_memmap(os.path.join(path, 'matrices.npy'), mode='w+', dtype=np.int8,
+                                  shape=(len(canonical_boards), UPPER_TRIANGLE_SIZE)).flush()
+        np.save(os.path.join(path, 'completed.npy'),
+                np.zeros(len(canonical_boards), dtype=bool))
+        return cls(path, mode='r+')
+
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        return all(os.path.exists(os.path.join(path, file_name))
+                   for file_name in ['boards.npy', 'matrices.npy', 'completed.npy'])
+
+    def get_board_index(self, board: Sequence[int]) -> int:
+        # Row of the canonical form of board. Raises KeyError if it is not in the store
+        board_combination_index = combination_index(canonicalize_board(board))
+        row = int(np.searchsorted(
+            self.board_combination_indices, board_combination_index))
+        if row == len(self.boards) or self.board_combination_indices[row] != board_combination_index:
+            raise KeyError(f'Board {list(board)} is not in the store')
+        return row
+
+    def lookup(self, board: Sequence[int]) -> TriangularUtilityMatrix:
+        # Utility matrix of the canonical form of board, as a view into the file. Index it with
+        # the hole pairs from get_hole_pair_permutation(board) unless the board is already canonical
+        row = self.get_board_index(board)
+        if not self.completed[row]:
+            raise KeyError(f'Board {list(board)} has not been generated')
+        return TriangularUtilityMatrix(self.matrices[row])
+
+    def get_hole_pair_permutation(self, board: Sequence[int]) -> np.ndarray:
+        # (1326,) index of each hole pair after the suits are relabeled like the board is in the store
+        hole_pair_index = get_hole_pair_index()
+        canonical_suits = get_canonical_suits([], board)
+        return np.array([hole_pair_index.card_pair_to_index[relabel_suits(hole_pair, canonical_suits)]
+                         for hole_pair in hole_pair_index.hole_pair_cards.tolist()], dtype=np.int64)
+
+    def get_missing_board_indices(self) -> np.ndarray:
+        return np.flatnonzero(~self.completed)
+
+    def mark_completed(self, board_indices: Sequence[int]) -> None:
+        self.completed[board_indices] = True
+        self.completed.flush()
+
+
+def generate_utility_matrices(task) -> list:
+    # Worker entry point. Writes the matrices of one chunk of boards straight into the memory-mapped file
+    path, board_indices = task
+    store = UtilityMatrixStore(path, mode='r+')
+    utility_matrix_handler = UtilityMatrixHandler(
+        dtype=np.int8, layout='triangular')
+    for board_index in board_indices:
+        public_cards = [Card.from_index(int(card))
+                        for card in store.boards[board_index]]
+        utility_matrix_handler.generate_utility_matrix(public_cards)
+        store.matrices[board_index] = utility_matrix_handler.utility_matrix.upper_triangle
+    store.matrices.flush()
+    return board_indices
+
+
+def get_store_size(n_boards: int) -> int:
+    # Bytes of the matrices of n_boards canonical boards
+    return n_boards * UPPER_TRIANGLE_SIZE
+
+
+def generate_utility_matrix_store(path=UTILITY_MATRIX_STORE_PATH, boards: Optional[Iterable[Sequence[int]]] = None,
+                                  workers=1, boards_per_task=BOARDS_PER_TASK, verbose=False,
+                                  max_boards: Optional[int] = None) -> UtilityMatrixStore:
+    # Fills the store at path with the matrices that are missing, so an interrupted run continues where it stopped.
+    # boards defaults to the canonical river boards, and is only used when the store does not exist yet. All of them
+    # take about 118 GB, so max_boards keeps the ones that stand for the most boards
+    if UtilityMatrixStore.exists(path):
+        store = UtilityMatrixStore(path, mode='r+')
+    else:
+        if boards is None:
+            canonical_boards = get_canonical_boards(NUMBER_OF_COMMUNITY_CARDS)
+            boards = sorted(canonical_boards, key=canonical_boards.get, reverse=True)
+        boards = list(boards)[:max_boards]
+        if verbose:
+            print(f'Creating {path} for {len(boards)} boards, {get_store_size(len(boards)) / 1e9:.1f} GB')
+        store = UtilityMatrixStore.create(path, boards)
+
+    missing_board_indices = store.get_missing_board_indices().tolist()
+    tasks = [(path, missing_board_indices[i:i + boards_per_task])
+             for i in range(0, len(missing_board_indices), boards_per_task)]
+
+    def mark_completed(completed_board_indices):
+        # Only the parent process writes the flags, after the worker has flushed the matrices
+        store.mark_completed(completed_board_indices)
+        if verbose:
+            print(f'{np.count_nonzero(store.completed)}/{len(store.boards)} boards')
+
+    if workers > 1:
+        with Pool(workers) as pool:
+            for completed_board_indices in pool.imap_unordered(generate_utility_matrices, tasks):
+                mark_completed(completed_board_indices)
+    else:
+        for task in tasks:
+            mark_completed(generate_utility_matrices(task))
+    return store
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Precomputes the river utility matrices of canonical boards. Run it again to resume')
+    parser.add_argument('--path', default=UTILITY_MATRIX_STORE_PATH)
+    parser.add_argument('--boards', type=int, default=1000,
+                        help='Number of canonical boards to store, 0 for all of them (about 118 GB)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--boards-per-task', type=int,
+                        default=BOARDS_PER_TASK)
+    args = parser.parse_args()
+
+    generate_utility_matrix_store(
+        args.path, workers=args.workers, boards_per_task=args.boards_per_task, verbose=True,
+        max_boards=args.boards if args.boards > 0 else None)
+    print(f'Wrote {args.path}')
@@ -0,0 +1,90 @@
+from typing import List, Optional, Tuple
+from functools import lru_cache
+from game_manager.deck_manager import NUMBER_OF_CARDS
+from poker_oracle.hole_pairs import NUMBER_OF_HOLE_PAIRS
+
+import os
+import numpy as np
+
+HIDDEN_LAYER_SIZES = [500, 500, 500]
+# Pot, cards on the board, and the ranges of both players
+INPUT_SIZE = 1 + NUMBER_OF_CARDS + 2 * NUMBER_OF_HOLE_PAIRS
+OUTPUT_SIZE = 2 * NUMBER_OF_HOLE_PAIRS
+# Pots are given to the network relative to this, the chips of four players with 100 chips each
+DEFAULT_POT_SCALE = 400.0
+
+# Trained offline. DeepStackResolver falls back to rollouts when it is missing
+VALUE_NETWORK_PATH = os.path.join(
+    os.path.dirname(__file__), 'value_network.npz')
+
+
+class CounterfactualValueNetwork:
+    """
+    Feed-forward network in numpy that maps (pot, board, range of player 0, range of player 1) to the expected utility
+    of every hole pair of both players against the range of the other, as UtilityMatrixLeafEvaluator computes it.
+    Ranges are normalized to sum to 1. Hidden layers use ReLU, and a final correction makes the outputs zero-sum,
+    since whatever one player wins, the other loses
+    """
+
+    def __init__(self, layers: List[Tuple[np.ndarray, np.ndarray]], pot_scale=DEFAULT_POT_SCALE) -> None:
+        # layers are (weights (n_in, n_out), biases (n_out,)) pairs
+        assert layers[0][0].shape[0] == INPUT_SIZE and layers[-1][0].shape[1] == OUTPUT_SIZE
+        self.layers = [(weights.astype(np.float32), biases.astype(np.float32)) for weights, biases in layers]
+        self.pot_scale = pot_scale
+
+    @classmethod
+    def initialize(cls, hidden_layer_sizes=HIDDEN_LAYER_SIZES, pot_scale=DEFAULT_POT_SCALE, rng=None) -> 'CounterfactualValueNetwork':
+        # Random He-initialized weights, the starting point for training
+        rng = np.random.default_rng() if rng is None else rng
+        layer_sizes = [INPUT_SIZE] + list(hidden_layer_sizes) + [OUTPUT_SIZE]
+        layers = [(rng.normal(0, np.sqrt(2 / n_in), (n_in, n_out)), np.zeros(n_out))
+                  for n_in, n_out in zip(layer_sizes[:-1], layer_sizes[1:])]
+        return cls(layers, pot_scale)
+
+    @classmethod
+    def load(cls, path=VALUE_NETWORK_PATH) -> Optional['CounterfactualValueNetwork']:
+        # Returns None if no network has been trained
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as arrays:
+            n_layers = len([name for name in arrays.files if name.startswith('weights_')])
+            layers = [(arrays[f'weights_{i}'], arrays[f'biases_{i}']) for i in range(n_layers)]
+            return cls(layers, float(arrays['pot_scale']))
+
+    def save(self, path=VALUE_NETWORK_PATH) -> None:
+        arrays = {'pot_scale': np.array(self.pot_scale)}
+        for i, (weights, biases) in enumerate(self.layers):
+            arrays[f'weights_{i}'] = weights
+            arrays[f'biases_{i}'] = biases
+        np.savez(path, **arrays)
+
+    def create_inputs(self, pots: np.ndarray, board_cards: List[int], ranges: np.ndarray) -> np.ndarray:
+        # pots (n,), board card indices shared by all n situations, and normalized ranges (n, 2, 1326)
+        inputs = np.zeros((len(pots), INPUT_SIZE), dtype=np.float32)
+        inputs[:, 0] = pots / self.pot_scale
+        inputs[:, 1 + np.array(board_cards, dtype=np.int64)] = 1
+        inputs[:, 1 + NUMBER_OF_CARDS:] = ranges.reshape(len(pots), -1)
+        return inputs
+
+    def forward(self, inputs: np.ndarray) -> np.ndarray:
+        # (n, INPUT_SIZE) to (n, OUTPUT_SIZE), one matrix product per layer for the whole batch
+        activations = inputs
+        for i, (weights, biases) in enumerate(self.layers):
+            activations = activations @ weights + biases
+            if i < len(self.layers) - 1:
+                activations = np.maximum(activations, 0)
+        return activations
+
+    def predict(self, pots: np.ndarray, board_cards: List[int], ranges: np.ndarray) -> np.ndarray:
+        # Expected utilities (n, 2, 1326) for normalized ranges (n, 2, 1326)
+        ranges = ranges.astype(np.float32)
+        values = self.forward(self.create_inputs(pots, board_cards, ranges)).reshape(ranges.shape)
+        # Spread the total value of the two players evenly over all hole pairs, which makes the range-weighted sum zero
+        total_values = (values * ranges).sum(axis=(1, 2))
+        return values - (total_values / 2)[:, None, None]
+
+
+@lru_cache(maxsize=None)
+def get_value_network() -> Optional[CounterfactualValueNetwork]:
+    # None if it has not been trained
+    return CounterfactualValueNetwork.load()
@@ -0,0 +1,186 @@
+from typing import List, Optional, Sequence
+from poker_oracle.hole_pairs import get_hole_pair_index, NUMBER_OF_HOLE_PAIRS
+
+import numpy as np
+
+# Bets and raises per player node chain before only calling, folding and going all in are left
+MAX_RAISES_PER_STREET = 2
+
+
+class BettingNode:
+    """
+    Node in the betting tree of the rest of a street between the acting player (0) and one opponent (1).
+    Terminal nodes have player None and kind 'fold' or 'showdown'. A showdown ends the street: the river
+    showdown, or a leaf valued by a leaf evaluator before the river
+    """
+
+    def __init__(self, player: Optional[int], contributions: Sequence[float], kind='player', folded_player=None) -> None:
+        self.player = player
+        self.contributions = tuple(contributions)
+        self.kind = kind
+        self.folded_player = folded_player
+        self.actions: List[str] = []
+        self.children: List['BettingNode'] = []
+
+    def is_terminal(self) -> bool:
+        return self.player is None
+
+
+def get_actions() -> List[str]:
+    # Imported here, since game_manager imports the resolvers through player
+    from game_manager.game_manager import ActionManager
+    return ActionManager.ACTIONS
+
+
+def build_betting_tree(contributions, stacks, bet_size, root_actions=None, max_raises=MAX_RAISES_PER_STREET) -> BettingNode:
+    # contributions and stacks are the chips each player has put in the pot and has left. Bets are always bet_size,
+    # as in ActionManager. root_actions restricts the actions of player 0 at the root, by default ActionManager.ACTIONS
+    actions = get_actions()
+    return _build_player_node(0, list(contributions), list(stacks), bet_size, 0, False,
+                              actions if root_actions is None else root_actions, max_raises, actions)
+
+
+def _build_player_node(player, contributions, stacks, bet_size, n_raises, has_checked, allowed_actions, max_raises, actions) -> BettingNode:
+    opponent = 1 - player
+    amount_to_call = contributions[opponent] - contributions[player]
+    node = BettingNode(player, contributions)
+
+    def add_child(action, child):
+        node.actions.append(action)
+        node.children.append(child)
+
+    def put_chips(amount):
+        new_contributions, new_stacks = list(contributions), list(stacks)
+        new_contributions[player] += amount
+        new_stacks[player] -= amount
+        return new_contributions, new_stacks
+
+    if 'F' in allowed_actions and amount_to_call > 0:
+        add_child('F', BettingNode(None, contributions, 'fold', folded_player=player))
+    if 'C' in allowed_actions:
+        new_contributions, new_stacks = put_chips(min(amount_to_call, stacks[player]))
+        if amount_to_call > 0 or has_checked or stacks[opponent] == 0:
+            add_child('C', BettingNode(None, new_contributions, 'showdown'))
+        else:
+            add_child('C', _build_player_node(opponent, new_contributions, new_stacks, bet_size,
+                                              n_raises, True, actions, max_raises, actions))
+    # Raising only makes sense if the opponent has chips left to call with
+    can_raise = stacks[opponent] > 0 and stacks[player] > amount_to_call
+    if 'B' in allowed_actions and can_raise and n_raises < max_raises and stacks[player] > amount_to_call + bet_size:
+        new_contributions, new_stacks = put_chips(amount_to_call + bet_size)
+        add_child('B', _build_player_node(opponent, new_contributions, new_stacks, bet_size,
+                                          n_raises + 1, False, actions, max_raises, actions))
+    if 'A' in allowed_actions and can_raise:
+        new_contributions, new_stacks = put_chips(stacks[player])
+        add_child('A', _build_player_node(opponent, new_contributions, new_stacks, bet_size,
+                                          n_raises + 1, False, actions, max_raises, actions))
+    return node
+
+
+class CFRPlusSolver:
+    """
+    CFR+ over a betting tree, on range vectors over the 1326 hole pairs of both players. Every iteration passes
+    the ranges down the tree, values all terminal nodes in one batch, and passes the counterfactual values back up,
+    updating the regrets and average strategies of all player nodes with array operations
+    """
+
+    def __init__(self, root: BettingNode, leaf_evaluator, dead_money=0.0) -> None:
+        # leaf_evaluator.get_expected_utilities values the showdown nodes. dead_money is what other players put in the pot
+        self.root = root
+        self.leaf_evaluator = leaf_evaluator
+        self.dead_money = dead_money
+        self.hole_pair_index = get_hole_pair_index()
+
+        self.nodes: List[BettingNode] = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            self.nodes.append(node)
+            stack.extend(reversed(node.children))
+        self.player_nodes = [node for node in self.nodes if not node.is_terminal()]
+        self.fold_nodes = [node for node in self.nodes if node.kind == 'fold']
+        self.showdown_nodes = [node for node in self.nodes if node.kind == 'showdown']
+
+        for node in self.player_nodes:
+            node.regrets = np.zeros((len(node.actions), NUMBER_OF_HOLE_PAIRS))
+            node.strategy_sums = np.zeros((len(node.actions), NUMBER_OF_HOLE_PAIRS))
+
+        # Chips in the pot and the matched contribution of each player at every showdown. A short all-in call gets the rest back
+        matched_contributions = np.array([min(node.contributions) for node in self.showdown_nodes])
+        self.showdown_stakes = matched_contributions
+        self.showdown_pots = 2 * matched_contributions + dead_money
+        self.n_iterations = 0
+
+    def get_current_strategy(self, node: BettingNode) -> np.ndarray:
+        # Regret matching on the regrets, which CFR+ keeps non-negative
+        totals = node.regrets.sum(axis=0)
+        return np.where(totals > 0, node.regrets / np.where(totals > 0, totals, 1), 1 / len(node.actions))
+
+    def get_average_strategy(self, node: BettingNode) -> np.ndarray:
+        # (n_actions, 1326) probability of each action for each hole pair of the acting player
+        totals = node.strategy_sums.sum(axis=0)
+        return np.where(totals > 0, node.strategy_sums / np.where(totals > 0, totals, 1), 1 / len(node.actions))
+
+    def solve(self, ranges: np.ndarray, n_iterations: int) -> None:
+        # ranges (2, 1326) of the acting player and the opponent at the root
+        for _ in range(n_iterations):
+            self.iterate(ranges)
+
+    def iterate(self, ranges: np.ndarray) -> np.ndarray:
+        # Returns the counterfactual values (2, 1326) at the root
+        self.n_iterations += 1
+        return self.traverse(ranges, self.get_current_strategy, update=True)
+
+    def get_average_strategy_values(self, ranges: np.ndarray) -> np.ndarray:
+        # Counterfactual values (2, 1326) at the root when both players play the average strategy
+        return self.traverse(ranges, self.get_average_strategy, update=False)
+
+    def traverse(self, ranges, get_strategy, update) -> np.ndarray:
+        node_ranges = {id(self.root): ranges}
+        strategies = {}
+        for node in self.player_nodes:
+            strategy = strategies[id(node)] = get_strategy(node)
+            for action_index, child in enumerate(node.children):
+                child_ranges = node_ranges[id(node)].copy()
+                child_ranges[node.player] *= strategy[action_index]
+                node_ranges[id(child)] = child_ranges
+
+        node_values = {}
+        self.evaluate_terminal_nodes(node_ranges, node_values)
+
+        for node in reversed(self.player_nodes):
+            player = node.player
+            child_values = np.array([node_values[id(child)] for child in node.children])
+            strategy = strategies[id(node)]
+            values = child_values.sum(axis=0)
+            values[player] = (strategy * child_values[:, player]).sum(axis=0)
+            node_values[id(node)] = values
+
+            if update:
+                node.regrets = np.maximum(node.regrets + child_values[:, player] - values[player], 0)
+                # Later iterations weigh more in the average strategy, as in CFR+
+                node.strategy_sums += self.n_iterations * strategy * node_ranges[id(node)][player]
+        return node_values[id(self.root)]
+
+    def evaluate_terminal_nodes(self, node_ranges, node_values) -> None:
+        # Values are the chips each hole pair wins or loses from here, weighted by the opponent range
+        if self.showdown_nodes:
+            ranges = np.array([node_ranges[id(node)] for node in self.showdown_nodes])
+            compatible_range_sums = self.hole_pair_index.get_compatible_range_sums(ranges[:, ::-1])
+            expected_utilities = self.leaf_evaluator.get_expected_utilities(self.showdown_pots, ranges)
+            pots = self.showdown_pots[:, None, None]
+            # Winning takes the pot and losing gives it up, so a tie is worth half the pot minus the stake
+            values = pots / 2 * expected_utilities + \
+                (pots / 2 - self.showdown_stakes[:, None, None]) * compatible_range_sums
+            for node, node_value in zip(self.showdown_nodes, values):
+                node_values[id(node)] = node_value
+
+        for node in self.fold_nodes:
+            ranges = node_ranges[id(node)]
+            compatible_range_sums = self.hole_pair_index.get_compatible_range_sums(ranges[::-1])
+            pot = sum(node.contributions) + self.dead_money
+            folded_player, other_player = node.folded_player, 1 - node.folded_player
+            values = np.empty((2, NUMBER_OF_HOLE_PAIRS))
+            values[folded_player] = -node.contributions[folded_player] * compatible_range_sums[folded_player]
+            values[other_player] = (pot - node.contributions[other_player]) * compatible_range_sums[other_player]
+            node_values[id(node)] = values
@@ -1,29 +1,130 @@
 import numpy as np
-from poker_oracle.monte_carlo import MonteCarlo
-from game_manager.pivotal_parameters import pivotal_parameters as piv
+from resolvers.cfr_plus import CFRPlusSolver, build_betting_tree
+from poker_oracle.hole_pairs import get_hole_pair_index, NUMBER_OF_HOLE_PAIRS
+from poker_oracle.monte_carlo import MonteCarlo, WinProbabilityEstimate
+from poker_oracle.preflop_equity_table import get_preflop_equity_table
+from poker_oracle.value_network import get_value_network
+from poker_oracle.equity_cache import equity_cache as shared_equity_cache
 
 
 class Resolver():
-    def __init__(self) -> None:
-        self.monte_carlo = MonteCarlo()
     pass
 
 
 class DeepStackResolver(Resolver):
-    pass
+    """
+    Re-solves the rest of the current street with CFR+ before every action, against one opponent standing in for all
+    remaining players. The end of the street is valued by a leaf evaluator: exact showdowns on the river, and the
+    counterfactual value network or rollouts before it. The own range is narrowed by the strategy
+    of each action taken during the round, while the opponent range is uniform over the hole pairs the board allows
+    """
+
+    def __init__(self, n_iterations=100, n_leaf_boards=32, value_network=None, rng=None) -> None:
+        # value_network defaults to the trained network from value_network.npz, if there is one
+        self.value_network = value_network
+        self.n_iterations = n_iterations
+        self.n_leaf_boards = n_leaf_boards
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.hole_pair_index = get_hole_pair_index()
+        self.range = None
+        self.range_hand_id = None
+
+    def get_ranges(self, player, state):
+        # (2, 1326) ranges of the player and the opponent. A new hand starts a new uniform own range
+        if self.range is None or self.range_hand_id != state.hand_id:
+            self.range = np.ones(NUMBER_OF_HOLE_PAIRS)
+            self.range_hand_id = state.hand_id
+        is_possible = self.hole_pair_index.get_possible_hole_pairs(
+            [card.index for card in state.community_cards])
+        self.range = self.range * is_possible
+        ranges = np.array([self.range, is_possible.astype(np.float64)])
+        return ranges / ranges.sum(axis=1, keepdims=True)
+
+    def get_leaf_evaluator(self, state):
+        # Exact on the river. Before it, the value network if one has been trained, and otherwise rollouts
+        # Imported here since the hands evaluator imports game_manager.player, which imports this module
+        from poker_oracle.leaf_evaluator import UtilityMatrixLeafEvaluator, ValueNetworkLeafEvaluator
+        from poker_oracle.showdown_evaluator import ShowdownEvaluator
+        if len(state.community_cards) == 5:
+            return ShowdownEvaluator(state.community_cards)
+        value_network = self.value_network if self.value_network is not None else get_value_network()
+        if value_network is not None:
+            return ValueNetworkLeafEvaluator(value_network, state.community_cards)
+        return UtilityMatrixLeafEvaluator.from_public_cards(state.community_cards, self.n_leaf_boards, self.rng)
+
+    def create_solver(self, player, state):
+        amount_to_call = state.get_amount_to_call(player)
+        contributions = [player.betted_chips, player.betted_chips + amount_to_call]
+        opponents = [opponent for opponent in state.remaining_players if opponent is not player]
+        # The opponent with the most chips left after calling decides how far the betting can go
+        opponent_stack = max([opponent.chips - (contributions[1] - opponent.betted_chips)
+                              for opponent in opponents], default=0)
+        stacks = [player.chips, max(opponent_stack, 0)]
+        bet_size = state.get_amount_to_bet(player) - amount_to_call
+        root = build_betting_tree(contributions, stacks, bet_size, root_actions=state.possible_actions)
+        dead_money = max(state.pot - sum(contributions), 0)
+        return CFRPlusSolver(root, self.get_leaf_evaluator(state), dead_money)
 
+    def choose_action(self, player, state):
+        solver = self.create_solver(player, state)
+        ranges = self.get_ranges(player, state)
+        solver.solve(ranges, self.n_iterations)
 
-class PureRolloutResolver(Resolver):
+        average_strategy = solver.get_average_strategy(solver.root)
+        hole_pair = self.hole_pair_index.hole_pair_to_index(player.hand)
+        action_index = self.rng.choice(len(solver.root.actions), p=average_strategy[:, hole_pair])
+        # The opponent can tell which hole pairs would have taken this action
+        self.range = self.range * average_strategy[action_index]
+        return solver.root.actions[action_index]
 
-    def get_win_probability_from_hole_cards(self, player, community_cards, num_opponents=1):
-        win_probability = self.monte_carlo.evaluate_player_win_probability_after_pre_flop(
-            player, community_cards, num_opponents)
-        return win_probability
 
-    def choose_action(self, player, state):
-        win_probability = self.get_win_probability_from_hole_cards(
-            player, state.community_cards, num_opponents=state.num_remaining_players - 1)
+class PureRolloutResolver(Resolver):
 
+    def __init__(self, max_rollouts=10000, time_budget=1.0, equity_cache=shared_equity_cache, verbose=True, seed=None) -> None:
+        # Rollouts stop early once the best action is known, and after time_budget seconds per decision.
+        # Estimates are cached, so the later actions of a street usually need no rollouts.
+        # verbose prints the estimate and the ranked actions of every decision. seed seeds the rollouts,
+        # which only makes decisions reproducible without a time_budget
+        self.monte_carlo = MonteCarlo(seed=seed)
+        self.verbose = verbose
+        self.max_rollouts = max_rollouts
+        self.time_budget = time_budget
+        self.equity_cache = equity_cache
+
+    def estimate_win_probability(self, player, state):
+        # Returns a WinProbabilityEstimate with the precision and number of rollouts behind it
+        num_opponents = state.num_remaining_players - 1
+        preflop_equity_table = get_preflop_equity_table()
+        if not state.community_cards and preflop_equity_table is not None:
+            # Precomputed offline, so no rollouts are needed before the flop
+            win_probability = preflop_equity_table.lookup(
+                player.hand, num_opponents)
+            if win_probability is not None:
+                return WinProbabilityEstimate(win_probability, 0.0, 0, False)
+
+        key = self.equity_cache.create_key(
+            player.hand, state.community_cards, num_opponents)
+        # A cached estimate may have been stopped early for another pot size, so it is only reused if it still decides the action
+        estimate = self.equity_cache.get(key, is_usable=lambda estimate: estimate.exact or
+                                         self.best_action_is_stable(player, state, estimate))
+        if estimate is None:
+            estimate = self.monte_carlo.estimate_hole_pair_win_probability(
+                player.hand, num_opponents, state.community_cards, max_rollouts=self.max_rollouts,
+                time_budget=self.time_budget, stop_condition=lambda estimate: self.best_action_is_stable(player, state, estimate))
+            self.equity_cache.put(key, estimate)
+        return estimate
+
+    def best_action_is_stable(self, player, state, estimate):
+        # The expected utilities are linear in the win probability, so if the same action is best at both ends
+        # of the confidence interval, it is the best action everywhere in it
+        lowest_win_probability = max(
+            estimate.win_probability - estimate.confidence_half_width, 0.0)
+        highest_win_probability = min(
+            estimate.win_probability + estimate.confidence_half_width, 1.0)
+        return self.rank_actions(player, state, lowest_win_probability)[0][0] == \
+            self.rank_actions(player, state, highest_win_probability)[0][0]
+
+    def rank_actions(self, player, state, win_probability):
         # Want to add potsize later
         expected_utility = []
         for action in state.possible_actions:
@@ -31,9 +132,14 @@ class PureRolloutResolver(Resolver):
                 player, action, state, win_probability)
             expected_utility.append((action, utility))
 
-        expected_utility_sorted = sorted(
-            expected_utility, key=lambda x: x[1], reverse=True)
-        print(win_probability, expected_utility_sorted)
+        return sorted(expected_utility, key=lambda x: x[1], reverse=True)
+
+    def choose_action(self, player, state):
+        estimate = self.estimate_win_probability(player, state)
+        expected_utility_sorted = self.rank_actions(
+            player, state, estimate.win_probability)
+        if self.verbose:
+            print(estimate.win_probability, estimate.n_rollouts, expected_utility_sorted)
 
         return expected_utility_sorted[0][0]
 
@@ -0,0 +1,89 @@
+import unittest
+import numpy as np
+from types import SimpleNamespace
+from game_manager.player import Player
+from game_manager.deck_manager import Card
+from resolvers.resolvers import DeepStackResolver
+from resolvers.cfr_plus import CFRPlusSolver, build_betting_tree
+from poker_oracle.hole_pairs import get_hole_pair_index
+from poker_oracle.leaf_evaluator import UtilityMatrixLeafEvaluator, ValueNetworkLeafEvaluator
+from poker_oracle.value_network import CounterfactualValueNetwork
+
+
+class TestCFRPlus(unittest.TestCase):
+    def setUp(self):
+        self.public_cards = [Card('S', '6'), Card('S', '5'), Card('C', 'A'), Card('C', '2'), Card('C', '7')]
+        self.hole_pair_index = get_hole_pair_index()
+
+    def test_betting_tree(self):
+        root = build_betting_tree([10, 20], [90, 80], 10)
+        self.assertEqual(root.actions, ['F', 'C', 'B', 'A'])
+        self.assertEqual(root.children[1].kind, 'showdown')
+        self.assertEqual(root.children[1].contributions, (20, 20))
+        self.assertEqual(root.children[2].contributions, (30, 20))
+
+        # Checking gives the opponent a turn, and a second check ends the street
+        root = build_betting_tree([20, 20], [80, 80], 10, root_actions=['F', 'C'])
+        self.assertEqual(root.actions, ['C'])
+        self.assertEqual(root.children[0].player, 1)
+        self.assertEqual(root.children[0].children[0].kind, 'showdown')
+
+        # Against an all-in the only options are folding and calling
+        all_in_node = build_betting_tree([20, 20], [80, 50], 10).children[-1]
+        self.assertEqual(all_in_node.actions, ['F', 'C'])
+        self.assertEqual(all_in_node.children[1].contributions, (100, 70))
+
+    def test_solve_river(self):
+        root = build_betting_tree([10, 20], [90, 80], 10)
+        solver = CFRPlusSolver(root, UtilityMatrixLeafEvaluator.from_public_cards(self.public_cards))
+        is_possible = self.hole_pair_index.get_possible_hole_pairs([card.index for card in self.public_cards])
+        ranges = np.array([is_possible, is_possible], dtype=np.float64) / np.count_nonzero(is_possible)
+        solver.solve(ranges, 50)
+
+        average_strategy = solver.get_average_strategy(root)
+        self.assertTrue(np.allclose(average_strategy.sum(axis=0), 1))
+        # The straight flush never folds, and a weak high card mostly folds
+        nuts = self.hole_pair_index.hole_pair_to_index('S3S4')
+        self.assertLess(average_strategy[0, nuts], 0.01)
+        worst_hand = self.hole_pair_index.hole_pair_to_index('D3H8')
+        self.assertGreater(average_strategy[0, worst_hand], 0.5)
+
+
+class TestDeepStackResolver(unittest.TestCase):
+    def setUp(self):
+        self.player = Player()
+        self.player.hand = [Card('S', 'A'), Card('H', 'A')]
+        self.player.chips, self.player.betted_chips = 90, 10
+        opponent = Player()
+        opponent.chips, opponent.betted_chips = 80, 20
+        self.state = SimpleNamespace(hand_id=0, community_cards=[Card('S', '6'), Card('S', '5'), Card('C', 'A'), Card('C', '2'), Card('C', '7')],
+                                     possible_actions=['F', 'C', 'B', 'A'], pot=30, remaining_players=[self.player, opponent],
+                                     get_amount_to_call=lambda player: 10, get_amount_to_bet=lambda player: 20)
+
+    def test_choose_action(self):
+        player, state = self.player, self.state
+        resolver = DeepStackResolver(n_iterations=20, rng=np.random.default_rng(0))
+        action = resolver.choose_action(player, state)
+        self.assertIn(action, ['C', 'B', 'A'])
+        # The own range is weighted by how likely each hole pair was to take the action
+        self.assertEqual(np.count_nonzero(resolver.range), 1081)
+        self.assertGreater(np.ptp(resolver.range[resolver.range > 0]), 0.5)
+
+        # The range is kept during the hand, and the same hole cards in a later hand start from a uniform range again
+        resolver.get_ranges(player, state)
+        self.assertGreater(np.ptp(resolver.range[resolver.range > 0]), 0.5)
+        state.hand_id = 1
+        ranges = resolver.get_ranges(player, state)
+        self.assertEqual(np.ptp(resolver.range[resolver.range > 0]), 0)
+        self.assertEqual(np.count_nonzero(ranges[0]), 1081)
+
+    def test_value_network_leaves(self):
+        self.state.community_cards = self.state.community_cards[:3]
+        value_network = CounterfactualValueNetwork.initialize([32], rng=np.random.default_rng(0))
+        resolver = DeepStackResolver(n_iterations=20, value_network=value_network, rng=np.random.default_rng(0))
+        self.assertIsInstance(resolver.get_leaf_evaluator(self.state), ValueNetworkLeafEvaluator)
+        self.assertIn(resolver.choose_action(self.player, self.state), self.state.possible_actions)
+
+
+if __name__ == '__main__':
+    unittest.main()
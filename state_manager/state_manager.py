@@ -5,6 +5,7 @@ class State:
         self.possible_actions = ['F', 'C', 'B', 'A']
 
     def update_state(self):
+        self.hand_id = self.round_manager.hand_id
         self.community_cards = self.round_manager.community_cards
         self.pot = sum(
             player.betted_chips for player in self.round_manager.game_manager.players)